@@ -0,0 +1,260 @@
+"""Candidate-search HTTP service on asyncio.
+
+Serves the same flow as the Streamlit chat, so other tools can use it:
+classify -> (follow-up) -> Cypher -> Neo4j -> render. It uses the async
+Neo4j driver and async Gemini calls through the LLM gateway. At most
+API_MAX_CONCURRENCY requests are handled at once; a request that waits
+longer than API_QUEUE_TIMEOUT seconds for a slot gets a 503.
+
+    POST /chat            {"query": "...", "session_id": "optional"}
+    DELETE /sessions/<id> forget a session's follow-up context
+    GET  /health
+
+Follow-ups ("what are their emails?") resolve against the candidates of the
+previous answer in the same session_id.
+
+    python api_server.py --port 8080
+    python api_server.py --fake    # local stand-ins for Gemini and Neo4j
+"""
+import argparse
+import asyncio
+import json
+import os
+import uuid
+
+from dotenv import load_dotenv
+
+from memory_cypher_chain import (
+    add_to_memory,
+    ais_followup_query,
+    aplan_followup,
+    clear_session_memory,
+    forget_candidates,
+    load_summary_from_mongodb,
+    remember_candidates,
+)
+from utils import llm_gateway
+from utils import telemetry
+from utils.graph_schema import GRAPH_SCHEMA_TEXT
+from utils.llm_query_helpers import (
+    acandidate_query_to_cypher,
+    adetect_query_type,
+    adisplay_results_with_llm,
+    arun_cypher,
+)
+
+load_dotenv()
+
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))
+API_QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "30"))
+API_MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(64 * 1024)))
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+
+logger = telemetry.get_logger("api_server")
+
+
+class Overloaded(Exception):
+    pass
+
+
+class ChatService:
+    """The chat flow, with the LLM and Neo4j driver injected.
+
+    ``persist_memory`` also writes each turn to MongoDB like the Streamlit
+    app does; without it follow-up context lives only in this process.
+    """
+
+    def __init__(self, llm, driver, schema=GRAPH_SCHEMA_TEXT, max_concurrency=None,
+                 queue_timeout=None, persist_memory=False):
+        self.llm = llm
+        self.driver = driver
+        self.schema = schema
+        self.persist_memory = persist_memory
+        self.queue_timeout = API_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency or API_MAX_CONCURRENCY)
+
+    async def chat(self, query, session_id):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded()
+        try:
+            with telemetry.span("api.chat"):
+                return await self._chat(query, session_id)
+        finally:
+            self._slots.release()
+
+    async def _conversation(self, query):
+        prompt = llm_gateway.load_prompt("cvparser") + "\nUSER: " + query
+        return (await llm_gateway.ainvoke(prompt, "basic_conversation", self.llm)).content
+
+    async def _chat(self, query, session_id):
+        if self.persist_memory:
+            with telemetry.span("chat.load_memory"):
+                await asyncio.to_thread(load_summary_from_mongodb, session_id)
+
+        with telemetry.span("chat.classify"):
+            query_type = await adetect_query_type(query, self.llm)
+        reply = {"session_id": session_id, "query_type": query_type, "followup": False,
+                 "cypher": None, "rows": [], "truncated": False}
+
+        if query_type == "vulgar":
+            reply["answer"] = "Please use appropriate language."
+            return reply
+        if query_type != "candidate":
+            with telemetry.span("chat.conversation"):
+                reply["answer"] = await self._conversation(query)
+            return reply
+
+        with telemetry.span("chat.followup_check"):
+            followup = await ais_followup_query(query, self.llm)
+        with telemetry.span("chat.cypher_generation", followup=followup):
+            if followup:
+                cypher, params = await aplan_followup(query, self.llm, self.schema, session_id)
+            else:
+                cypher, params = await acandidate_query_to_cypher(query, self.schema, self.llm), None
+        with telemetry.span("chat.run_cypher"):
+            rows, truncated = await arun_cypher(cypher, self.driver, params, max_rows=API_PAGE_SIZE)
+        with telemetry.span("chat.render"):
+            answer = await adisplay_results_with_llm(rows, self.llm)
+
+        with telemetry.span("chat.persist_memory"):
+            if self.persist_memory and rows:
+                await asyncio.to_thread(add_to_memory, query, rows, session_id)
+            else:
+                remember_candidates(session_id, rows)
+
+        reply.update(followup=followup, cypher=cypher, rows=rows, truncated=truncated,
+                     answer=answer if rows else "No matching candidates found.")
+        return reply
+
+    def forget(self, session_id):
+        if self.persist_memory:
+            clear_session_memory(session_id)
+        else:
+            forget_candidates(session_id)
+
+
+# --- minimal HTTP/1.1 on asyncio streams ---
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+async def _write_json(writer, status, payload):
+    body = json.dumps(payload, default=str).encode()
+    head = (f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n").encode()
+    writer.write(head + body)
+    await writer.drain()
+
+
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        return None
+    method, path, _ = request_line.split(" ", 2)
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    if length > API_MAX_BODY_BYTES:
+        raise ValueError(413)
+    body = await reader.readexactly(length) if length else b""
+    return method, path, body
+
+
+async def _route(service, method, path, body):
+    if path == "/health":
+        return 200, {"status": "ok"}
+    if path == "/chat":
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return 400, {"error": "body must be JSON"}
+        if not isinstance(payload, dict):
+            return 400, {"error": "body must be a JSON object"}
+        query = (payload.get("query") or "").strip()
+        if not query:
+            return 400, {"error": "query is required"}
+        session_id = payload.get("session_id") or str(uuid.uuid4())
+        try:
+            return 200, await service.chat(query, session_id)
+        except Overloaded:
+            return 503, {"error": "too many requests in flight"}
+    if path.startswith("/sessions/") and method == "DELETE":
+        await asyncio.to_thread(service.forget, path[len("/sessions/"):])
+        return 200, {"status": "cleared"}
+    return 404, {"error": "not found"}
+
+
+def make_handler(service):
+    async def handle(reader, writer):
+        try:
+            try:
+                request = await _read_request(reader)
+            except ValueError as e:
+                status = e.args[0] if e.args and e.args[0] in _REASONS else 400
+                await _write_json(writer, status, {"error": _REASONS[status]})
+                return
+            if request is None:
+                return
+            try:
+                status, payload = await _route(service, *request)
+            except Exception as e:
+                logger.exception("request failed", extra={"path": request[1]})
+                status, payload = 500, {"error": str(e)}
+            await _write_json(writer, status, payload)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(service, host="127.0.0.1", port=8080):
+    server = await asyncio.start_server(make_handler(service), host, port)
+    logger.info("api server listening", extra={"host": host, "port": port})
+    async with server:
+        await server.serve_forever()
+
+
+def build_service(fake=False, persist_memory=True):
+    if fake:
+        from benchmarks.fakes import AsyncFakeDriver, FakeLLM
+        return ChatService(FakeLLM(latency=0.05), AsyncFakeDriver(), persist_memory=False)
+    from neo4j import AsyncGraphDatabase
+    uri, user, password = os.getenv("NEO4J_URI"), os.getenv("NEO4J_USER"), os.getenv("NEO4J_PASSWORD")
+    if not all([uri, user, password]):
+        raise ValueError("NEO4J_URI, NEO4J_USER, and NEO4J_PASSWORD environment variables must be set.")
+    driver = AsyncGraphDatabase.driver(uri, auth=(user, password))
+    return ChatService(llm_gateway.get_llm("gemini-2.5-flash", temperature=0.1), driver,
+                       persist_memory=persist_memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8080")))
+    parser.add_argument("--fake", action="store_true", help="use local stand-ins for Gemini and Neo4j")
+    parser.add_argument("--no-persist", action="store_true", help="keep session context in memory only")
+    args = parser.parse_args()
+
+    telemetry.configure_logging()
+    telemetry.start_metrics_server()
+    service = build_service(fake=args.fake, persist_memory=not args.no_persist)
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,33 @@
 import streamlit as st
 import os
-from pydantic import SecretStr
 from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
 from langchain.chains import ConversationChain
-from neo4j import GraphDatabase
-from langchain_google_genai import ChatGoogleGenerativeAI
-from utils.neo4j_ops import save_to_neo4j
-from pymongo import MongoClient
+from utils.ingest_pipeline import ingest_files
+from utils.extraction_cache import get_extraction_cache
+from utils.result_cache import get_result_cache
+from utils.schema_migrations import ensure_schema
+from utils.connections import get_neo4j_driver, health_check, pool_metrics
+from utils import llm_gateway
+from utils import telemetry
+from utils.graph_schema import GRAPH_SCHEMA_TEXT
 import uuid
 
 
-#database connection
-client = MongoClient(os.getenv("MONGODB_URI"))
-db = client[os.getenv("MONGODB_DB_NAME")]
-collection = db["candidates"]
-
 # Local imports
-from utils.extract_cv_data import extract_text_from_pdf, extract_candidate_data
-
 from utils.llm_query_helpers import (
     detect_query_type,
     candidate_query_to_cypher,
-    run_cypher,
-    display_results_with_llm
+    route_query_combined,
+    stream_cypher,
+    stream_results_with_llm
 )
 
+from chat_pipeline import plan_chat_turn
+
 from memory_cypher_chain import(
-    memory,
+    get_session_memory,
+    clear_session_memory,
     add_to_memory,
     is_followup_query,
     handle_followup,
@@ -38,39 +38,25 @@ from memory_cypher_chain import(
 # Load environment variables
 load_dotenv()
 
+telemetry.configure_logging()
+telemetry.start_metrics_server()
+
 def initialize_llm():
     # """Initialize and return the LLM with API key check."""
     google_api_key = os.getenv("GOOGLE_API_KEY")
     if not google_api_key:
         raise ValueError("GOOGLE_API_KEY environment variable is not set.")
 
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        temperature=0.1,
-        api_key=SecretStr(google_api_key)
-    )
-
-from memory_cypher_chain import memory, add_to_memory, is_followup_query, handle_followup
+    # Shared client: reruns reuse it instead of building a new one
+    return llm_gateway.get_llm("gemini-2.5-flash", temperature=0.1)
 
 def get_knowledge_graph_schema():
     """Return the schema of the Neo4j knowledge graph."""
-    return """
-(:Candidate {name, email})
-(:Skill {name})
-(:Education {university, degree})
-(:Work {company, position, years})
-(:Project {name})
-
-(:Candidate)-[:HAS_SKILL]->(:Skill)
-(:Candidate)-[:STUDIED_IN]->(:Education)
-(:Candidate)-[:WORKED_IN]->(:Work)
-(:Candidate)-[:HAS_PROJECT_ON]->(:Project)
-"""
+    return GRAPH_SCHEMA_TEXT
 
 def handle_basic_conversation(query, conversation_chain):
-    # Load the prompt template (only once per process in production)
-    with open("cvparser_prompt_template.txt", "r") as f:
-        system_prompt = f.read()
+    # Prompt templates are read once per process by the gateway
+    system_prompt = llm_gateway.load_prompt("cvparser")
     # If the conversation_chain supports a system prompt, set it here
     if hasattr(conversation_chain, 'system_prompt'):
         conversation_chain.system_prompt = system_prompt
@@ -80,8 +66,8 @@ def handle_basic_conversation(query, conversation_chain):
         # Instead, call the LLM directly with the system prompt and user query as context
         # (Assuming conversation_chain.predict() just sends the input to the LLM)
         # You may need to adjust this depending on your LLM wrapper
-        response = conversation_chain.llm.invoke(system_prompt + "\nUSER: " + query).content
-        print(response)
+        response = llm_gateway.invoke(system_prompt + "\nUSER: " + query, "basic_conversation",
+                                      conversation_chain.llm.chat_model).content
         # Optionally, manually add to memory here if needed
         return response
 
@@ -95,13 +81,12 @@ def main():
     # Initialize LLM and Neo4j
     llm = initialize_llm()
     
-    # Neo4j configuration
-    neo4j_uri = os.getenv("NEO4J_URI")
-    neo4j_user = os.getenv("NEO4J_USER")
-    neo4j_password = os.getenv("NEO4J_PASSWORD")
-    if not all([neo4j_uri, neo4j_user, neo4j_password]):
-        raise ValueError("NEO4J_URI, NEO4J_USER, and NEO4J_PASSWORD environment variables must be set.")
-    driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
+    # Neo4j driver is created once per process and reused across reruns
+    driver = get_neo4j_driver()
+    try:
+        ensure_schema(driver)
+    except Exception as e:
+        st.warning(f"Could not apply Neo4j schema migrations: {e}")
     
     # Initialize conversation chains
     custom_prompt = PromptTemplate(
@@ -116,9 +101,14 @@ def main():
         CV parser:"""
     )
     
+    # Each browser session gets its own memory from the per-process registry
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = str(uuid.uuid4())
+    memory = get_session_memory(st.session_state["session_id"])
+
     # Initialize conversation chain for conversation between user and cv parser
     conversation_chain = ConversationChain(
-        llm=llm,
+        llm=llm_gateway.GatewayLLM(call_site="conversation_chain", client=llm),
         memory=memory,
         prompt=custom_prompt,
         verbose=False
@@ -128,16 +118,25 @@ def main():
     uploaded_files = st.file_uploader("Upload CVs (PDF only)", type=["pdf"], accept_multiple_files=True)
     
     if uploaded_files:
-        with open("utils/extraction_prompt.txt") as f:
-            prompt_template = f.read()
-            for uploaded_file in uploaded_files:
-                with st.expander(f"Processing: {uploaded_file.name}"):
-                    raw_text = extract_text_from_pdf(uploaded_file)
-                    candidate_data = extract_candidate_data(raw_text, prompt_template)
-                    st.json(candidate_data)
-
-                    result = save_to_neo4j(candidate_data)
-                    st.success(result)
+        prompt_template = llm_gateway.load_prompt("extraction")
+
+        progress = st.progress(0.0, text=f"Processing {len(uploaded_files)} CV(s)...")
+
+        def report_progress(outcome, completed, total):
+            progress.progress(completed / total, text=f"Processed {completed}/{total}: {outcome['file']}")
+
+        outcomes = ingest_files(uploaded_files, prompt_template, on_progress=report_progress)
+        for outcome in outcomes:
+            with st.expander(f"Processing: {outcome['file']}"):
+                if outcome["status"] == "failed":
+                    st.error(f"Failed during {outcome['stage']}: {outcome['error']}")
+                    continue
+                st.json(outcome["data"])
+                st.success(outcome["result"])
+                st.caption(
+                    f"CV text: {outcome['tokens_before']} → {outcome['tokens_after']} tokens"
+                    f" in {outcome['chunks']} extraction call(s)"
+                )
     
 
     # --- Streamlit chat interface ---
@@ -150,41 +149,86 @@ def main():
         with st.chat_message(role):
             st.markdown(msg)
 
+    def render_answer(result, pages):
+        # Known result shapes render locally; anything else streams from the
+        # LLM into the chat bubble as tokens arrive.
+        with st.chat_message("ai"):
+            text = st.write_stream(stream_results_with_llm(result, llm))
+            if pages.truncated:
+                total = f"more than {pages.total_matched}" if pages.total_capped else pages.total_matched
+                note = f"Showing the first {len(result)} of {total} matches."
+                st.caption(note)
+                text += f"\n\n_{note}_"
+            return text
+
     # --- Chat input handling with st.chat_input ---
     def process_chat_input():
         user_query = st.session_state["chat_input"]
         if not user_query:
             return
 
-        # Ensure session_id is set
-        if "session_id" not in st.session_state:
-            st.session_state["session_id"] = str(uuid.uuid4())
         session_id = st.session_state["session_id"]
+        combined = st.session_state.get("combined_routing")
+        # Concurrent mode loads memory alongside the routing stages instead
+        concurrent = st.session_state.get("concurrent_stages") and not combined
 
         # Always load the latest summary for this session
-        load_summary_from_mongodb(session_id)
+        if not concurrent:
+            with telemetry.span("chat.load_memory"):
+                load_summary_from_mongodb(session_id)
 
         st.session_state["chat_history"].append(("user", user_query))
+        with st.chat_message("user"):
+            st.markdown(user_query)
         schema = get_knowledge_graph_schema()
-        with st.spinner("Analyzing query..."):
-            query_type = detect_query_type(user_query, llm)
 
+        # Combined mode: category, follow-up flag and Cypher from one LLM call.
+        # Falls back to the separate calls below if the response is invalid.
+        routed = None
+        if combined:
+            with st.spinner("Analyzing query..."), telemetry.span("chat.route_combined"):
+                routed = route_query_combined(user_query, schema, llm)
+        elif concurrent:
+            # Memory, classification, follow-up check and a speculative Cypher
+            # generation run at the same time; same result shape as above.
+            with st.spinner("Analyzing query..."), telemetry.span("chat.plan_concurrent"):
+                routed = plan_chat_turn(user_query, llm, schema, session_id)
+
+        if routed:
+            query_type = routed["category"]
+        else:
+            with st.spinner("Analyzing query..."), telemetry.span("chat.classify"):
+                query_type = detect_query_type(user_query, llm)
+
+        if routed:
+            is_followup = routed["followup"]
+        else:
+            with telemetry.span("chat.followup_check"):
+                is_followup = query_type == "candidate" and is_followup_query(user_query, llm)
 
         # Check for follow-up intent for candidate queries
-        if query_type == "candidate" and is_followup_query(user_query, llm):
+        if query_type == "candidate" and is_followup:
             with st.spinner("Answering follow-up..."):
-                result = handle_followup(user_query, driver, llm, schema, memory)
+                with telemetry.span("chat.cypher_generation", followup=True):
+                    pages = handle_followup(user_query, driver, llm, schema, session_id,
+                                            base_cypher=routed["cypher"] if routed else None)
+                # Only the first page is materialized for display and memory
+                with telemetry.span("chat.run_cypher", followup=True):
+                    result = pages.first_page()
+                if pages.error is not None:
+                    st.error(f" Error running Cypher query: {pages.error}")
             
             if result:
-                display_text = display_results_with_llm(result, llm)
+                with telemetry.span("chat.render"):
+                    display_text = render_answer(result, pages)
                 st.session_state["chat_history"].append(("ai", display_text))
-                add_to_memory(user_query, result, session_id=session_id)
-                print("\n[DEBUG] Follow-up query result from handle folowup:\n", result)
+                with telemetry.span("chat.persist_memory"):
+                    add_to_memory(user_query, result, session_id=session_id)
             else:
                 response = "I couldn't find any information for your follow-up query."
                 st.session_state["chat_history"].append(("ai", response))
         elif query_type in ("greet", "conversation"):
-            with st.spinner("Replying..."):
+            with st.spinner("Replying..."), telemetry.span("chat.conversation"):
                 response = handle_basic_conversation(user_query, conversation_chain)
             st.session_state["chat_history"].append(("ai", response))
 
@@ -195,12 +239,16 @@ def main():
 
         # Handle candidate queries
         elif query_type == "candidate":
-            with st.spinner("Generating Cypher query..."):
-                cypher_query = candidate_query_to_cypher(user_query, schema, llm)
-                print("\n[DEBUG] Generated Cypher query:\n", cypher_query)
-            with st.spinner("Querying Neo4j..."):
-                result = run_cypher(cypher_query, driver)
-                print("\n[DEBUG] Normal query result:\n", result)
+            with st.spinner("Generating Cypher query..."), telemetry.span("chat.cypher_generation"):
+                if routed and routed["cypher"]:
+                    cypher_query = routed["cypher"]
+                else:
+                    cypher_query = candidate_query_to_cypher(user_query, schema, llm)
+            with st.spinner("Querying Neo4j..."), telemetry.span("chat.run_cypher"):
+                pages = stream_cypher(cypher_query, driver)
+                result = pages.first_page()
+            if pages.error is not None:
+                st.error(f" Error running Cypher query: {pages.error}")
 
             # Show debug information if enabled
             if 'show_debug' in st.session_state and st.session_state.show_debug:
@@ -210,9 +258,11 @@ def main():
                 st.json(result)
 
             if result:
-                display_text = display_results_with_llm(result, llm)
+                with telemetry.span("chat.render"):
+                    display_text = render_answer(result, pages)
                 st.session_state["chat_history"].append(("ai", display_text))
-                add_to_memory(user_query, result, session_id=session_id)
+                with telemetry.span("chat.persist_memory"):
+                    add_to_memory(user_query, result, session_id=session_id)
             else:
                 response = "No matching candidates found."
                 st.session_state["chat_history"].append(("ai", response))
@@ -234,9 +284,39 @@ def main():
     show_debug = st.sidebar.checkbox("Show debug information", value=False)
     st.session_state.show_debug = show_debug
 
+    # Single-call routing (category + follow-up + Cypher in one LLM response)
+    st.sidebar.checkbox(
+        "Single-call query routing",
+        value=os.getenv("COMBINED_ROUTING", "").lower() in ("1", "true", "yes"),
+        key="combined_routing",
+    )
+    # Concurrent routing stages with speculative Cypher generation
+    st.sidebar.checkbox(
+        "Concurrent query routing",
+        value=os.getenv("CONCURRENT_ROUTING", "").lower() in ("1", "true", "yes"),
+        key="concurrent_stages",
+    )
+
+    stats = get_extraction_cache().stats()
+    st.sidebar.caption(
+        f"Extraction cache: {stats['entries']} entries, "
+        f"{stats['hits']} hits / {stats['misses']} misses"
+    )
+
+    if show_debug:
+        with st.sidebar.expander("Connections"):
+            st.json({"health": health_check(), "pools": pool_metrics()})
+        with st.sidebar.expander("LLM calls"):
+            st.json(llm_gateway.stats())
+        with st.sidebar.expander("Stage timings"):
+            st.json(telemetry.snapshot())
+        with st.sidebar.expander("Result cache"):
+            cache = get_result_cache()
+            st.json(cache.stats() if cache is not None else {"enabled": False})
+
     # Clear memory button
     if st.sidebar.button("Clear Memory"):
-        memory.clear()
+        clear_session_memory(st.session_state["session_id"])
         st.success("Conversation memory cleared.")
 
 
@@ -0,0 +1,297 @@
+"""Deterministic stand-ins for Gemini and Neo4j, plus synthetic CV PDFs.
+
+Used by the offline benchmarks so ingest performance can be measured without
+network access or a database. The fakes implement only the calls this repo
+makes: ``llm.invoke`` / ``ainvoke`` / ``stream``, ``driver.session()`` with
+``run`` and ``write_transaction``, and the same for the async driver.
+"""
+import asyncio
+import io
+import json
+import re
+import threading
+import time
+
+SKILL_POOL = ["Python", "SQL", "JavaScript", "React", "Docker", "Kubernetes", "Go", "Java",
+              "Machine Learning", "AWS", "Node.js", "PostgreSQL", "TypeScript", "C++"]
+
+
+# --- synthetic CVs ---
+
+def cv_lines(i, pages=2):
+    """Text of synthetic CV ``i``, as a list of lines per page."""
+    skills = [SKILL_POOL[(i + k) % len(SKILL_POOL)] for k in range(4)]
+    header = [f"Candidate {i} | candidate{i}@example.com", ""]
+    body = [
+        "Summary",
+        f"Software engineer number {i} with experience building data products.",
+        "Skills",
+        ", ".join(skills),
+        "Education",
+        f"BSc Computer Science, University {i % 7}",
+        "Work Experience",
+    ]
+    for job in range(3 * pages):
+        body.append(f"Engineer at Company {(i + job) % 11}, 2019 - 2022")
+        body.append("Built services, pipelines and dashboards used across the business.")
+    body += ["Projects", f"Project Atlas {i}", f"Project Beacon {i}"]
+    per_page = -(-len(body) // pages)
+    return [header + body[p * per_page:(p + 1) * per_page] + [f"Page {p + 1} of {pages}"]
+            for p in range(pages)]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """Minimal valid PDF with one Helvetica text block per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        ops = " T* ".join(f"({_escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 10 Tf 14 TL 56 760 Td {ops} ET".encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer << /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+class NamedBytesIO(io.BytesIO):
+    """In-memory upload with a ``name``, like Streamlit's UploadedFile."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def synthetic_corpus(size, pages=2):
+    return [NamedBytesIO(make_pdf(cv_lines(i, pages)), f"cv_{i:05d}.pdf") for i in range(size)]
+
+
+# --- Gemini stand-in ---
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 0, "output_tokens": len(content) // 4}
+
+    def __add__(self, other):
+        return FakeMessage(self.content + other.content)
+
+
+class FakeLLM:
+    """Answers this repo's prompts after ``latency`` seconds.
+
+    Extraction prompts are answered from the CV text they contain; routing,
+    Cypher and display prompts get fixed, valid answers.
+    """
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt):
+        if "**conversation** or **candidate**" in prompt:
+            return "candidate"
+        if "followup or standalone" in prompt:
+            return "standalone"
+        if "Cypher" in prompt and "Resume Text:" not in prompt:
+            return "MATCH (c:Candidate) RETURN c.name, c.email LIMIT 25"
+        if "Format the following database query result" in prompt:
+            return "Here are the matching candidates."
+        if "USER:" in prompt:
+            return "Hello! Ask me about the candidates in the graph."
+        return self._extract(prompt)
+
+    def _extract(self, prompt):
+        name = re.search(r"Candidate \d+", prompt)
+        email = re.search(r"[\w.]+@[\w.]+", prompt)
+        skills = [s for s in SKILL_POOL if re.search(rf"(?<!\w){re.escape(s)}(?!\w)", prompt)]
+        projects = re.findall(r"Project \w+ \d+", prompt)
+        return json.dumps({
+            "name": name.group(0) if name else None,
+            "email": email.group(0) if email else None,
+            "education": [{"degree": "BSc Computer Science", "university": "University 1"}],
+            "skills": [{"name": s} for s in skills],
+            "work_experience": [{"company": "Company 1", "position": "Engineer", "years": 3}],
+            "projects": [{"name": p} for p in dict.fromkeys(projects)],
+        })
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return FakeMessage(self._answer(str(prompt)))
+
+    async def ainvoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+        await asyncio.sleep(self.latency)
+        return FakeMessage(self._answer(str(prompt)))
+
+    def stream(self, prompt):
+        message = self.invoke(prompt)
+        for start in range(0, len(message.content), 64):
+            yield FakeMessage(message.content[start:start + 64])
+
+
+# --- Neo4j stand-in ---
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeResult(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def run(self, query, parameters=None, **params):
+        params = {**(parameters or {}), **params}
+        store = self.driver.candidates
+        if "GraphMeta" in query:
+            if "SET" in query:
+                self.driver.graph_version += 1
+                return FakeResult()
+            return FakeResult([FakeRecord({"version": self.driver.graph_version})])
+        if "batch" in params:
+            records = []
+            for row in params["batch"]:
+                key = (row["name"], row["email"])
+                records.append({"idx": row["idx"], "existed": key in store})
+                store.setdefault(key, row)
+            return FakeResult(records)
+        if "name" in params and "email" in params and "MERGE" in query:
+            store.setdefault((params["name"], params["email"]), params)
+            return FakeResult()
+        if "MATCH (c:Candidate" in query:
+            # Any candidate read returns name/email rows, filtered like the
+            # follow-up filter when $candidates is given
+            wanted = params.get("candidates")
+            return FakeResult(
+                FakeRecord({"c.name": name, "c.email": email})
+                for name, email in sorted(store)
+                if wanted is None or any(k["name"] == name and k["email"] in (None, email) for k in wanted)
+            )
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def _transaction(self, fn, *args, **kwargs):
+        time.sleep(self.driver.latency)
+        with self.driver.lock:
+            return fn(FakeTransaction(self.driver), *args, **kwargs)
+
+    write_transaction = execute_write = _transaction
+    read_transaction = execute_read = _transaction
+
+    def run(self, query, parameters=None, **params):
+        time.sleep(self.driver.latency)
+        with self.driver.lock:
+            return FakeTransaction(self.driver).run(query, parameters, **params)
+
+
+class FakeDriver:
+    """Keeps candidates in a dict; every transaction costs ``latency`` seconds."""
+
+    def __init__(self, latency=0.005):
+        self.latency = latency
+        self.candidates = {}
+        self.graph_version = 0
+        self.lock = threading.Lock()
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+    def verify_connectivity(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class AsyncFakeResult:
+    def __init__(self, records):
+        self._records = list(records)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+    async def consume(self):
+        return None
+
+
+class AsyncFakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        pass
+
+    async def run(self, query, parameters=None, **params):
+        await asyncio.sleep(self.driver.latency)
+        with self.driver.lock:
+            return AsyncFakeResult(FakeTransaction(self.driver).run(query, parameters, **params))
+
+
+class AsyncFakeDriver(FakeDriver):
+    """neo4j.AsyncDriver stand-in over the same in-memory store."""
+
+    def session(self, **kwargs):
+        return AsyncFakeSession(self)
+
+    async def verify_connectivity(self):
+        return None
+
+    async def close(self):
+        pass
@@ -0,0 +1,109 @@
+"""Offline ingest benchmark: parse, extract, store and the full pipeline.
+
+Runs on synthetic CV PDFs against deterministic stand-ins for Gemini and
+Neo4j (benchmarks/fakes.py), so it needs no network or database. For each
+corpus size it reports CVs/s, per-call latency percentiles and the
+tracemalloc peak of every stage, and writes the report as JSON so runs can be
+compared for regressions.
+
+    python -m benchmarks.ingest_benchmark --sizes 10 50 200 --llm-latency 0.05 --output ingest.json
+"""
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+from benchmarks.fakes import FakeDriver, FakeLLM, synthetic_corpus
+from utils.extract_cv_data import extract_candidate_data, extract_text_from_pdf
+from utils.ingest_pipeline import ingest_files
+from utils.llm_gateway import load_prompt
+from utils.neo4j_ops import save_candidates_to_neo4j, save_to_neo4j
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def measure(fn, items):
+    """Call ``fn`` on every item; return (results, stats)."""
+    latencies, results = [], []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        results.append(fn(item))
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ordered = sorted(latencies)
+    return results, {
+        "items": len(items),
+        "seconds": elapsed,
+        "per_s": len(items) / elapsed if elapsed else None,
+        "p50_s": _percentile(ordered, 0.50),
+        "p95_s": _percentile(ordered, 0.95),
+        "p99_s": _percentile(ordered, 0.99),
+        "peak_mem_bytes": peak,
+    }
+
+
+def run_size(size, pages, llm_latency, neo4j_latency, prompt_template):
+    corpus = synthetic_corpus(size, pages)
+    report = {}
+
+    texts, report["parse"] = measure(lambda f: extract_text_from_pdf(f.getvalue()), corpus)
+
+    llm = FakeLLM(llm_latency)
+    candidates, report["extract"] = measure(
+        lambda text: extract_candidate_data(text, prompt_template, use_cache=False, llm=llm), texts)
+
+    driver = FakeDriver(neo4j_latency)
+    _, report["store_single"] = measure(lambda c: save_to_neo4j(dict(c), driver=driver), candidates)
+
+    driver = FakeDriver(neo4j_latency)
+    _, report["store_batch"] = measure(
+        lambda batch: save_candidates_to_neo4j([dict(c) for c in batch], driver=driver), [candidates])
+    report["store_batch"]["cvs_per_s"] = size / report["store_batch"]["seconds"]
+
+    for f in corpus:
+        f.seek(0)
+    llm, driver = FakeLLM(llm_latency), FakeDriver(neo4j_latency)
+    outcomes, pipeline = measure(
+        lambda files: ingest_files(files, prompt_template, llm=llm, driver=driver, use_cache=False), [corpus])
+    outcomes = outcomes[0]
+    pipeline["cvs_per_s"] = size / pipeline["seconds"] if pipeline["seconds"] else None
+    pipeline["failed"] = sum(1 for o in outcomes if o["status"] == "failed")
+    pipeline["tokens_before"] = sum(o["tokens_before"] or 0 for o in outcomes)
+    pipeline["tokens_after"] = sum(o["tokens_after"] or 0 for o in outcomes)
+    pipeline["llm_calls"] = llm.calls
+    report["pipeline"] = pipeline
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50], help="corpus sizes to run")
+    parser.add_argument("--pages", type=int, default=2, help="pages per synthetic CV")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake Gemini call")
+    parser.add_argument("--neo4j-latency", type=float, default=0.005, help="seconds per fake Neo4j transaction")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    prompt_template = load_prompt("extraction")
+    report = {
+        "config": {**vars(args), "python": platform.python_version()},
+        "runs": {str(size): run_size(size, args.pages, args.llm_latency, args.neo4j_latency, prompt_template)
+                 for size in args.sizes},
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
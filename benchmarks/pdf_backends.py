@@ -0,0 +1,104 @@
+"""Compare PDF text-extraction backends on a directory of CVs.
+
+Every installed backend (see utils.pdf_text.available_backends) extracts
+every ``*.pdf`` in the fixture directory. Throughput is reported as files and
+pages per second. When a ``<name>.txt`` reference transcript sits next to
+``<name>.pdf``, quality is scored as word-level F1 against it.
+
+    python -m benchmarks.pdf_backends fixtures/cvs --repeat 3 --output pdf.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import statistics
+import time
+from collections import Counter
+
+from utils.pdf_text import available_backends, extract_pages
+
+_WORD = re.compile(r"\w+")
+
+
+def word_f1(text, reference):
+    got = Counter(w.lower() for w in _WORD.findall(text))
+    want = Counter(w.lower() for w in _WORD.findall(reference))
+    overlap = sum((got & want).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(got.values())
+    recall = overlap / sum(want.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def load_fixtures(directory):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.pdf"))):
+        with open(path, "rb") as f:
+            data = f.read()
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+        fixtures.append({"name": os.path.basename(path), "data": data, "reference": reference})
+    return fixtures
+
+
+def bench_backend(backend, fixtures, repeat, workers):
+    elapsed, pages, empty_pages, scores, failures = [], 0, 0, [], []
+    for fixture in fixtures:
+        try:
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                text_pages = extract_pages(fixture["data"], backend=backend, max_pages=0,
+                                           max_bytes=0, workers=workers)
+                runs.append(time.perf_counter() - start)
+        except Exception as e:
+            failures.append({"file": fixture["name"], "error": str(e)})
+            continue
+        elapsed.append(statistics.median(runs))
+        pages += len(text_pages)
+        empty_pages += sum(1 for page in text_pages if not page.strip())
+        if fixture["reference"] is not None:
+            scores.append(word_f1("\n".join(text_pages), fixture["reference"]))
+    total = sum(elapsed)
+    return {
+        "files": len(elapsed),
+        "pages": pages,
+        "seconds": total,
+        "files_per_s": len(elapsed) / total if total else None,
+        "pages_per_s": pages / total if total else None,
+        "empty_page_ratio": empty_pages / pages if pages else None,
+        "word_f1_mean": statistics.mean(scores) if scores else None,
+        "scored_files": len(scores),
+        "failures": failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", help="directory of *.pdf files (optional <name>.txt references)")
+    parser.add_argument("--backends", nargs="*", help="backends to run (default: all installed)")
+    parser.add_argument("--repeat", type=int, default=1, help="extractions per file; the median is kept")
+    parser.add_argument("--workers", type=int, default=None, help="page-extraction processes (default: PDF_PROCESS_WORKERS)")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"no PDF files in {args.fixtures}")
+    report = {
+        backend: bench_backend(backend, fixtures, args.repeat, args.workers)
+        for backend in (args.backends or available_backends())
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
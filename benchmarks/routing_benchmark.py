@@ -0,0 +1,95 @@
+"""Compare the three-call routing path with single-call combined routing.
+
+Runs live against Gemini, so GOOGLE_API_KEY (and the MongoDB settings that
+memory_cypher_chain needs at import) must be set. Caches and the local
+intent classifier are bypassed so both paths pay their full LLM cost.
+
+    python -m benchmarks.routing_benchmark --limit 20 --output routing.json
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import SecretStr
+
+from memory_cypher_chain import is_followup_query
+from utils.graph_schema import GRAPH_SCHEMA_TEXT
+from utils.intent_classifier import load_labelled_queries
+from utils.llm_query_helpers import detect_query_type, candidate_query_to_cypher, route_query_combined
+
+load_dotenv()
+
+
+def three_call_path(query, llm):
+    category = detect_query_type(query, llm, use_local=False)
+    followup = False
+    cypher = ""
+    if category == "candidate":
+        followup = is_followup_query(query, llm, use_local=False)
+        cypher = candidate_query_to_cypher(query, GRAPH_SCHEMA_TEXT, llm, use_cache=False)
+    return {"category": category, "followup": followup, "cypher": cypher}
+
+
+def _summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "mean_s": statistics.mean(ordered),
+        "p50_s": ordered[len(ordered) // 2],
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def run(limit, llm):
+    rows = load_labelled_queries()[:limit] if limit else load_labelled_queries()
+    timings = {"three_call": [], "combined": []}
+    fallbacks = category_agree = followup_agree = 0
+    for row in rows:
+        start = time.perf_counter()
+        baseline = three_call_path(row["query"], llm)
+        timings["three_call"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        combined = route_query_combined(row["query"], GRAPH_SCHEMA_TEXT, llm, use_cache=False)
+        timings["combined"].append(time.perf_counter() - start)
+
+        if combined is None:
+            fallbacks += 1
+            continue
+        category_agree += combined["category"] == baseline["category"]
+        followup_agree += combined["followup"] == baseline["followup"]
+
+    parsed = len(rows) - fallbacks
+    return {
+        "queries": len(rows),
+        "three_call": _summary(timings["three_call"]),
+        "combined": _summary(timings["combined"]),
+        "combined_fallback_rate": fallbacks / len(rows),
+        "category_agreement": category_agree / parsed if parsed else 0.0,
+        "followup_agreement": followup_agree / parsed if parsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=20, help="number of labelled queries to run (0 = all)")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    llm = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        temperature=0.1,
+        api_key=SecretStr(os.getenv("GOOGLE_API_KEY", "")),
+    )
+    report = run(args.limit, llm)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
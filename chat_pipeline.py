@@ -0,0 +1,84 @@
+"""Concurrent routing for one chat turn.
+
+By default a turn runs its stages one after another: load memory, classify,
+check for a follow-up, then generate Cypher. None of these depend on each
+other's output, so ``plan_chat_turn`` starts them all at once:
+
+- the session memory load,
+- query classification,
+- follow-up detection,
+- Cypher generation, started speculatively before we know it is needed.
+
+The speculative Cypher is dropped when the query is not a candidate query,
+or when the follow-up can be answered from a fixed template. A
+candidate turn then takes about as long as the slowest single LLM call,
+plus the Neo4j query.
+
+The result has the same shape as ``route_query_combined``,
+``{"category", "followup", "cypher"}``, so the app handles both the same way.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from memory_cypher_chain import (
+    build_followup_cypher,
+    get_last_candidates,
+    is_followup_query,
+    load_summary_from_mongodb,
+)
+from utils import telemetry
+from utils.intent_classifier import classify_query_type, INTENT_CONFIDENCE_THRESHOLD
+from utils.llm_query_helpers import candidate_query_to_cypher, detect_query_type
+
+load_dotenv()
+
+CHAT_PIPELINE_WORKERS = int(os.getenv("CHAT_PIPELINE_WORKERS", "16"))
+
+logger = telemetry.get_logger(__name__)
+
+_executor = ThreadPoolExecutor(CHAT_PIPELINE_WORKERS, thread_name_prefix="chat-stage")
+
+
+def _timed(stage, fn, *args, **kwargs):
+    with telemetry.span(stage):
+        return fn(*args, **kwargs)
+
+
+def plan_chat_turn(user_query, llm, schema, session_id="default", speculative=True):
+    """Run memory load, classification, follow-up detection and (speculative)
+    Cypher generation concurrently. The session memory is loaded on return."""
+    # The local classifier answers in microseconds; when it is sure this is
+    # small talk there is nothing to speculate on.
+    label, confidence = classify_query_type(user_query)
+    obviously_not_candidate = confidence >= INTENT_CONFIDENCE_THRESHOLD and label != "candidate"
+
+    memory = _executor.submit(_timed, "chat.load_memory", load_summary_from_mongodb, session_id)
+    classify = _executor.submit(_timed, "chat.classify", detect_query_type, user_query, llm)
+    followup = None
+    cypher = None
+    if not obviously_not_candidate:
+        followup = _executor.submit(_timed, "chat.followup_check", is_followup_query, user_query, llm)
+        if speculative:
+            cypher = _executor.submit(_timed, "chat.cypher_generation",
+                                      candidate_query_to_cypher, user_query, schema, llm)
+
+    query_type = classify.result()
+    memory.result()
+    plan = {"category": query_type, "followup": False, "cypher": None}
+    if query_type != "candidate":
+        if cypher is not None and not cypher.cancel():
+            logger.debug("discarded speculative cypher", extra={"query_type": query_type})
+        return plan
+
+    plan["followup"] = followup.result() if followup is not None else is_followup_query(user_query, llm)
+    candidates = get_last_candidates(session_id) if plan["followup"] else []
+    if candidates and build_followup_cypher(candidates, user_query) is not None:
+        # Answered from a template; the generated query is not needed
+        if cypher is not None:
+            cypher.cancel()
+        return plan
+
+    plan["cypher"] = cypher.result() if cypher is not None else None
+    return plan
@@ -1,13 +1,14 @@
-import os
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from utils.connections import get_mongo_client, get_mongo_db
+from utils.session_store import get_sessions_collection
+
 load_dotenv()
 
 # MongoDB Setup
-client = MongoClient(os.getenv("MONGODB_URI"))
-db = client[os.getenv("MONGODB_DB_NAME")]
-memory_collection = db["candidates"]
+client = get_mongo_client()
+db = get_mongo_db()
+memory_collection = get_sessions_collection()
 
 def debug_mongodb_operations():
     """Debug function to check MongoDB operations"""
@@ -38,9 +39,9 @@ def debug_mongodb_operations():
         for i, doc in enumerate(all_docs):
             print(f"  Document {i+1}:")
             print(f"    Session ID: {doc.get('session_id', 'N/A')}")
-            print(f"    Has summary: {'Yes' if 'summary' in doc else 'No'}")
-            if 'summary' in doc:
-                summary = doc['summary']
+            print(f"    Has messages: {'Yes' if 'messages' in doc else 'No'}")
+            if 'messages' in doc:
+                summary = doc['messages']
                 if isinstance(summary, list):
                     print(f"    Summary length: {len(summary)} messages")
                     for j, msg in enumerate(summary[:3]):  # Show first 3 messages
@@ -59,14 +60,14 @@ def check_recent_saves():
     print("\n=== Recent Saves Check ===")
     
     # Look for documents with recent timestamps or recent saves
-    recent_docs = list(memory_collection.find({}).sort("_id", -1).limit(5))
+    recent_docs = list(memory_collection.find({}).sort("updated_at", -1).limit(5))
     
     if recent_docs:
         print("📅 Most recent documents:")
         for i, doc in enumerate(recent_docs):
             print(f"  {i+1}. Session: {doc.get('session_id', 'N/A')}")
-            if 'summary' in doc:
-                summary = doc['summary']
+            if 'messages' in doc:
+                summary = doc['messages']
                 if isinstance(summary, list):
                     print(f"     Messages: {len(summary)}")
                 else:
@@ -0,0 +1,155 @@
+"""Bulk-load CVs from the command line.
+
+Walks a directory for PDFs (or reads a manifest: one path per line, or JSON
+lines with a "path" field) and runs them through the same concurrent
+parse -> extract -> store pipeline as the upload page. Every finished file
+is appended to a JSONL checkpoint. A rerun with the same checkpoint skips
+files that already succeeded, so an interrupted run picks up where it
+stopped. Use --retry-failed to try failed files again.
+
+    python ingest_cli.py /data/cvs --checkpoint cvs.checkpoint.jsonl
+    python ingest_cli.py manifest.txt --extract-workers 16
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+
+from utils.connections import get_neo4j_driver
+from utils.ingest_pipeline import ingest_files
+from utils.llm_gateway import load_prompt
+from utils.schema_migrations import ensure_schema
+from utils import telemetry
+
+load_dotenv()
+
+logger = telemetry.get_logger("ingest_cli")
+
+
+def find_pdfs(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(root, name)
+
+
+def read_manifest(path):
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                line = json.loads(line)["path"]
+            yield line if os.path.isabs(line) else os.path.join(base, line)
+
+
+def load_checkpoint(path):
+    """Latest recorded status per file."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by the interruption
+            done[entry["file"]] = entry["status"]
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory to walk for *.pdf, or a manifest file")
+    parser.add_argument("--checkpoint", help="JSONL progress file (default: <source>.checkpoint.jsonl)")
+    parser.add_argument("--retry-failed", action="store_true", help="retry files that failed in an earlier run")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="files handed to the pipeline at a time; bounds memory use")
+    parser.add_argument("--parse-workers", type=int)
+    parser.add_argument("--extract-workers", type=int)
+    parser.add_argument("--store-workers", type=int)
+    parser.add_argument("--store-batch-size", type=int)
+    args = parser.parse_args()
+
+    telemetry.configure_logging()
+    source = os.path.abspath(args.source)
+    paths = list(find_pdfs(source) if os.path.isdir(source) else read_manifest(source))
+    checkpoint = args.checkpoint or source.rstrip(os.sep) + ".checkpoint.jsonl"
+    previous = load_checkpoint(checkpoint)
+    skip = {"ok", "failed"} if not args.retry_failed else {"ok"}
+    todo = [p for p in dict.fromkeys(paths) if previous.get(p) not in skip]
+    print(f"{len(paths)} file(s) found, {len(paths) - len(todo)} already done, {len(todo)} to ingest")
+    if not todo:
+        return 0
+
+    driver = get_neo4j_driver()
+    try:
+        ensure_schema(driver)
+    except Exception as e:
+        logger.warning("could not apply schema migrations", extra={"error": str(e)})
+    prompt_template = load_prompt("extraction")
+
+    results = Counter()
+    failed_stages = Counter()
+    errors = Counter()
+    tokens = Counter()
+    start = time.perf_counter()
+
+    with open(checkpoint, "a", encoding="utf-8") as log:
+        def record(outcome, completed, total):
+            log.write(json.dumps({
+                "file": outcome["file"], "status": outcome["status"], "stage": outcome["stage"],
+                "result": outcome["result"], "error": outcome["error"], "ts": time.time(),
+            }) + "\n")
+            log.flush()
+            if outcome["status"] == "ok":
+                results[outcome["result"]] += 1
+                tokens["before"] += outcome["tokens_before"] or 0
+                tokens["after"] += outcome["tokens_after"] or 0
+            else:
+                failed_stages[outcome["stage"]] += 1
+                errors[outcome["error"]] += 1
+            done = sum(results.values()) + sum(failed_stages.values())
+            if done % 50 == 0 or done == len(todo):
+                elapsed = time.perf_counter() - start
+                print(f"  {done}/{len(todo)} files, {done / elapsed:.2f} CVs/s", flush=True)
+
+        interrupted = False
+        try:
+            for offset in range(0, len(todo), args.chunk_size):
+                ingest_files(
+                    todo[offset:offset + args.chunk_size], prompt_template,
+                    parse_workers=args.parse_workers, extract_workers=args.extract_workers,
+                    store_workers=args.store_workers, store_batch_size=args.store_batch_size,
+                    on_progress=record, driver=driver,
+                )
+        except KeyboardInterrupt:
+            interrupted = True
+
+    elapsed = time.perf_counter() - start
+    processed = sum(results.values()) + sum(failed_stages.values())
+    print("\n=== Ingest summary ===")
+    if interrupted:
+        print(f"Interrupted; rerun with --checkpoint {checkpoint} to resume")
+    print(f"Processed: {processed} file(s) in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.2f} CVs/s)")
+    for result, count in results.most_common():
+        print(f"  {result}: {count}")
+    if tokens["before"]:
+        print(f"CV text tokens: {tokens['before']} -> {tokens['after']}")
+    failed = sum(failed_stages.values())
+    print(f"Failed: {failed}" + (f" ({dict(failed_stages)})" if failed else ""))
+    for error, count in errors.most_common(5):
+        print(f"  {count}x {error}")
+    print(f"Checkpoint: {checkpoint}")
+    return 1 if failed or interrupted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
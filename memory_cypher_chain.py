@@ -1,84 +1,233 @@
 import os
+import re
+import threading
 from langchain.memory import ConversationSummaryBufferMemory
-from pymongo import MongoClient
 from dotenv import load_dotenv
 from utils.llm_query_helpers import (
+    acandidate_query_to_cypher,
     candidate_query_to_cypher,
-    run_cypher,
+    stream_cypher,
 )
-from pydantic import SecretStr
+from utils.session_store import (
+    SESSION_MAX_MESSAGES,
+    append_messages,
+    delete_session,
+    get_version,
+    load_messages,
+)
+from utils.lru_cache import LRUCache
+from utils import llm_gateway
+from utils.intent_classifier import classify_followup, INTENT_CONFIDENCE_THRESHOLD
+from utils import telemetry
 
 load_dotenv()
 
-# === MongoDB Setup ===
-client = MongoClient(os.getenv("MONGODB_URI"))
-db = client[os.getenv("MONGODB_DB_NAME")]
-memory_collection = db["candidates"]
+logger = telemetry.get_logger(__name__)
 
 # === Memory Setup ===
-from langchain_google_genai import ChatGoogleGenerativeAI
-summary_llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    temperature=0.3,
-    api_key=SecretStr(os.getenv("GOOGLE_API_KEY", ""))
-)
+# Summary calls go through the gateway like every other Gemini call
+summary_llm = llm_gateway.GatewayLLM(call_site="memory_summary", model="gemini-1.5-flash", temperature=0.3)
+
+# Bounds on what one process keeps in memory: idle sessions are evicted
+# least-recently-used first, and each session keeps only its latest messages.
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "200"))
+MEMORY_IDLE_SECONDS = float(os.getenv("MEMORY_IDLE_SECONDS", "3600"))
+MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", str(SESSION_MAX_MESSAGES)))
+
+
+class SessionMemory:
+    """One session's conversation memory plus its MongoDB sync state."""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.memory = ConversationSummaryBufferMemory(
+            llm=summary_llm,
+            memory_key="history",
+            return_messages=True
+        )
+        # Streamlit may run the same session's script in overlapping threads
+        self.lock = threading.RLock()
+        self.version = None   # stored version the in-process copy matches
+        self.persisted = 0    # how many of our messages are already stored
+        self.last_candidates = []  # {"name", "email"} of the last result set
+        self.context_dirty = False
+
+
+_sessions = LRUCache(maxsize=MEMORY_MAX_SESSIONS, ttl=MEMORY_IDLE_SECONDS)
+_sessions_lock = threading.Lock()
+
+
+def get_session_state(session_id="default"):
+    with _sessions_lock:
+        state = _sessions.get(session_id)
+        if state is None:
+            state = SessionMemory(session_id)
+        # Re-setting refreshes both the LRU position and the idle timeout
+        _sessions.set(session_id, state)
+        return state
+
+
+def get_session_memory(session_id="default"):
+    return get_session_state(session_id).memory
+
+
+def clear_session_memory(session_id="default"):
+    state = get_session_state(session_id)
+    with state.lock:
+        state.memory.clear()
+        delete_session(session_id)
+        state.version = None
+        state.persisted = 0
+        state.last_candidates = []
+        state.context_dirty = False
+
+
+# Candidates are identified the way neo4j_ops MERGEs them: by (name, email).
+# Generated queries return property columns, not element ids, so this is the
+# most precise handle a result row gives us.
+_NAME_COLUMN = re.compile(r"^(?:(c\d*|cand\d*|candidate\d*)\.name|name|candidate|candidate_?name)$")
+_EMAIL_COLUMN = re.compile(r"^(?:(c\d*|cand\d*|candidate\d*)\.email|email|candidate_?email)$")
+
+
+def _identity_columns(row):
+    """{variable: (name_key, email_key)} for the candidate columns of a row."""
+    names, emails = {}, {}
+    for key in row:
+        lowered = key.lower()
+        match = _NAME_COLUMN.match(lowered)
+        if match:
+            names[match.group(1) or ""] = key
+            continue
+        match = _EMAIL_COLUMN.match(lowered)
+        if match:
+            emails[match.group(1) or ""] = key
+    if len(names) == 1 and len(emails) == 1:
+        # "c.name" next to a bare "email" alias still describes one candidate
+        (var, name_key), = names.items()
+        return {var: (name_key, next(iter(emails.values())))}
+    return {var: (name_key, emails.get(var)) for var, name_key in names.items()}
+
+
+def candidates_from_result(result):
+    """Distinct {"name", "email"} identities in a result set; email is None
+    when the result does not return it."""
+    candidates = []
+    for row in result or []:
+        if not isinstance(row, dict):
+            continue
+        for name_key, email_key in _identity_columns(row).values():
+            name = row.get(name_key)
+            email = row.get(email_key) if email_key else None
+            if not isinstance(name, str):
+                continue
+            identity = {"name": name, "email": email if isinstance(email, str) else None}
+            if identity not in candidates:
+                candidates.append(identity)
+    return candidates
+
+
+def _as_identity(entry):
+    # Sessions saved before identities were recorded hold bare names
+    return {"name": entry, "email": None} if isinstance(entry, str) else entry
+
+
+def remember_candidates(session_id, result):
+    """Record the candidates of the latest result set for follow-ups.
+
+    An empty result leaves the previous set in place (nothing was answered);
+    a non-empty one without candidate columns clears it, so a later "their"
+    cannot refer to an older answer.
+    """
+    if not result:
+        return
+    candidates = candidates_from_result(result)
+    state = get_session_state(session_id)
+    with state.lock:
+        state.last_candidates = candidates
+        state.context_dirty = True
+
+
+def forget_candidates(session_id="default"):
+    state = get_session_state(session_id)
+    with state.lock:
+        state.last_candidates = []
+        state.context_dirty = True
+
+
+def get_last_candidates(session_id="default"):
+    state = get_session_state(session_id)
+    with state.lock:
+        return [dict(c) for c in state.last_candidates]
+
+
+def _serialize_message(msg):
+    if hasattr(msg, "to_dict"):
+        return msg.to_dict()
+    elif hasattr(msg, "content"):
+        return {
+            "type": getattr(msg, "type", "unknown"),
+            "content": msg.content,
+        }
+    return str(msg)
 
-memory = ConversationSummaryBufferMemory(
-    llm=summary_llm,
-    memory_key="history",
-    return_messages=True
-)
 
-# === Save summary after each interaction ===
+def _trim_messages(state):
+    messages = state.memory.chat_memory.messages
+    overflow = len(messages) - MEMORY_MAX_MESSAGES
+    if overflow > 0:
+        del messages[:overflow]
+        state.persisted = max(0, state.persisted - overflow)
+
+
+# === Save new messages after each interaction ===
 def save_summary_to_mongodb(session_id="default"):
-    print(f"[DEBUG] save_summary_to_mongodb called for session: {session_id}")
+    state = get_session_state(session_id)
     try:
-        summary = memory.load_memory_variables({})["history"]
-        print(f"[DEBUG] [save_summary_to_mongodb] Loaded summary: {summary}")
-        def serialize_message(msg):
-            if hasattr(msg, "to_dict"):
-                return msg.to_dict()
-            elif hasattr(msg, "content"):
-                return {
-                    "type": getattr(msg, "type", "unknown"),
-                    "content": msg.content,
-                }
-            return str(msg)
-        summary_serialized = [serialize_message(m) for m in summary]
-        print(f"[DEBUG] [save_summary_to_mongodb] Serialized summary: {summary_serialized}")
-        result = memory_collection.update_one(
-            {"session_id": session_id},
-            {"$set": {"summary": summary_serialized}},
-            upsert=True
-        )
-        print(f"[DEBUG] [save_summary_to_mongodb] MongoDB update result: {result.modified_count} modified, {result.upserted_id} upserted")
-        # print(f"[DEBUG] [save_summary_to_mongodb] ✅ Saved summary for session: {session_id}")
-    except Exception as e:
-        print(f"[DEBUG] [save_summary_to_mongodb] ❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        with state.lock:
+            messages = state.memory.chat_memory.messages
+            new_messages = [_serialize_message(m) for m in messages[state.persisted:]]
+            if not new_messages:
+                return
+            # Append-only: only this turn's messages go over the wire
+            context = {"last_candidates": state.last_candidates} if state.context_dirty else None
+            state.version = append_messages(session_id, new_messages, context)
+            state.context_dirty = False
+            state.persisted = len(messages)
+            _trim_messages(state)
+        logger.debug("saved session messages", extra={
+            "session_id": session_id, "appended": len(new_messages), "version": state.version})
+    except Exception:
+        logger.exception("saving session messages failed", extra={"session_id": session_id})
 
 def load_summary_from_mongodb(session_id="default"):
-    doc = memory_collection.find_one({"session_id": session_id})
-    if doc and "summary" in doc:
-        # print(f"[DEBUG] (MongoDB) Loaded summary for session: {session_id} (length: {len(doc['summary']) if isinstance(doc['summary'], list) else 'unknown'})")
+    state = get_session_state(session_id)
+    with state.lock:
+        version = get_version(session_id)
+        if state.version == version:
+            # In-process copy is already current; nothing to reload
+            return state.memory
+        messages, version, context = load_messages(session_id)
+        state.last_candidates = [_as_identity(c) for c in context.get("last_candidates", [])]
+        state.context_dirty = False
+        memory = state.memory
         memory.chat_memory.messages = []  # reset memory
-        summary = doc["summary"]
-        for msg in summary:
+        for msg in messages:
             if isinstance(msg, dict):
                 if msg.get("type") == "human":
                     memory.chat_memory.add_user_message(msg.get("content", ""))
                 elif msg.get("type") == "ai":
                     memory.chat_memory.add_ai_message(msg.get("content", ""))
-        print(f"[DEBUG] Memory restored from MongoDB for session: {session_id}")
-    else:
-        print(f"[DEBUG] No summary found for session: {session_id}")
+        state.version = version
+        state.persisted = len(memory.chat_memory.messages)
+        _trim_messages(state)
+    logger.debug("loaded session messages", extra={
+        "session_id": session_id, "messages": len(messages), "version": version})
+    return state.memory
 
 
 def add_to_memory(user_query, result, session_id="default"):
-    print(f"[DEBUG] add_to_memory called with user_query: {user_query}")
-    print(f"[DEBUG] add_to_memory called with result: {result}")
-    memory.chat_memory.add_user_message(user_query)
+    state = get_session_state(session_id)
+    memory = state.memory
     import json
     def serialize(obj):
         if hasattr(obj, 'items'):
@@ -88,21 +237,29 @@ def add_to_memory(user_query, result, session_id="default"):
         elif hasattr(obj, '__dict__'):
             return dict(obj.items())
         return obj
-    try:
-        result_serialized = serialize(result)
-        result_str = json.dumps(result_serialized, indent=2)
-        print(f"[DEBUG] [add_to_memory] result_str: {result_str}")
-        memory.chat_memory.add_ai_message(result_str)
-        save_summary_to_mongodb(session_id)
-    except Exception as e:
-        memory.chat_memory.add_ai_message("Could not save result summary.")
-        print("[DEBUG] [add_to_memory] Error:", e)
-        import traceback
-        traceback.print_exc()
-
-def is_followup_query(user_query, llm):
-    print(f"[DEBUG] is_followup_query called with user_query: {user_query}")
-    prompt = f"""
+    with state.lock:
+        remember_candidates(session_id, result)
+        memory.chat_memory.add_user_message(user_query)
+        try:
+            result_serialized = serialize(result)
+            result_str = json.dumps(result_serialized, indent=2)
+            memory.chat_memory.add_ai_message(result_str)
+            save_summary_to_mongodb(session_id)
+        except Exception:
+            memory.chat_memory.add_ai_message("Could not save result summary.")
+            logger.exception("adding result to memory failed", extra={"session_id": session_id})
+
+def _local_followup(user_query):
+    is_followup, confidence = classify_followup(user_query)
+    if confidence >= INTENT_CONFIDENCE_THRESHOLD:
+        logger.debug("follow-up classified locally", extra={
+            "followup": is_followup, "confidence": round(confidence, 3)})
+        return is_followup
+    return None
+
+
+def build_followup_prompt(user_query):
+    return f"""
 You are a classifier. Determine if the following user query is a follow-up question that refers to previous results or context (e.g., uses words like 'their', 'those', 'them', 'the above', 'the previous', etc.), or if it is a standalone question.
 
 Example:
@@ -110,20 +267,40 @@ Example:
 - can you return me their emails.
 - list me their education details. etc
 
+A query that names its own criteria is standalone even if it uses "their",
+e.g. "list all candidates with their emails" or "find python developers and their projects".
+
 User query: "{user_query}"
 
 Return only one word: followup or standalone.
 """
-    response = llm.invoke(prompt).content.strip().lower()
-    print(f"[DEBUG] [is_followup_query] LLM response: '{response}' for user_query: '{user_query}'")
+
+
+def parse_followup_response(response):
+    response = response.strip().lower()
     if response.startswith("```"):
         response = response.strip("``` ").strip()
-        print("[DEBUG] [is_followup_query] Cleaned response: {response}")
     is_followup = response == "followup"
-    print(f"[DEBUG] [is_followup_query] result: {is_followup}")
+    logger.debug("follow-up classified by LLM", extra={"followup": is_followup, "response": response})
     return is_followup
 
 
+def is_followup_query(user_query, llm, use_local=True):
+    local = _local_followup(user_query) if use_local else None
+    if local is not None:
+        return local
+    response = llm_gateway.invoke(build_followup_prompt(user_query), "is_followup_query", llm)
+    return parse_followup_response(response.content)
+
+
+async def ais_followup_query(user_query, llm, use_local=True):
+    local = _local_followup(user_query) if use_local else None
+    if local is not None:
+        return local
+    response = await llm_gateway.ainvoke(build_followup_prompt(user_query), "is_followup_query", llm)
+    return parse_followup_response(response.content)
+
+
 def _detect_requested_field(query: str):
     q = query.lower()
     if any(k in q for k in ["email", "e-mail", "mail"]):
@@ -141,135 +318,165 @@ def _detect_requested_field(query: str):
     # default -> let LLM handle
     return None
 
-def build_followup_cypher(names: set[str], user_query: str):
-    """Return a Cypher tailored to the requested field(s) for the given names.
+# Index seek on name, then the exact (name, email) identities. Both lists are
+# parameters, so every follow-up of the same kind reuses one cached plan.
+CANDIDATE_FILTER = (
+    "c.name IN $names AND any(k IN $candidates WHERE k.name = c.name "
+    "AND (k.email IS NULL OR k.email = c.email))"
+)
+
+
+def candidate_filter_params(candidates):
+    return {"names": sorted({c["name"] for c in candidates}),
+            "candidates": sorted(candidates, key=lambda c: (c["name"], c["email"] or ""))}
+
+
+def build_followup_cypher(candidates, user_query: str):
+    """Return (cypher, params) tailored to the requested field(s) for the
+    given {"name", "email"} identities.
     If the field cannot be recognised, return None to signal fallback to LLM."""
     field = _detect_requested_field(user_query)
     if not field:
         return None
 
-    names_literal = ", ".join([f'"{n}"' if "'" in n else f"\'{n}\'" for n in names])
+    params = candidate_filter_params(candidates)
     prefix = (
-        f"MATCH (c:Candidate)\n"
-        f"WHERE c.name IN [{names_literal}]\n"
+        "MATCH (c:Candidate)\n"
+        f"WHERE {CANDIDATE_FILTER}\n"
     )
 
     if field == "email":
-        return prefix + "RETURN DISTINCT c.name, c.email"
+        return prefix + "RETURN DISTINCT c.name, c.email", params
 
     if field == "education":
         return (
             prefix
             + "OPTIONAL MATCH (c)-[:STUDIED_IN]->(edu:Education)\n"
             + "RETURN c.name, collect(DISTINCT {university: edu.university, degree: edu.degree}) AS education"
-        )
+        ), params
 
     if field == "work":
         return (
             prefix
             + "OPTIONAL MATCH (c)-[:WORKED_IN]->(w:Work)\n"
             + "RETURN c.name, collect(DISTINCT {company: w.company, position: w.position, years: w.years}) AS workExperience"
-        )
+        ), params
  
     if field == "skill":
         return (
             prefix
             + "OPTIONAL MATCH (c)-[:HAS_SKILL]->(s:Skill)\n"
             + "RETURN c.name, collect(DISTINCT s.name) AS skills"
-        )
+        ), params
 
     if field == "project":
         return (
             prefix
             + "OPTIONAL MATCH (c)-[:HAS_PROJECT_ON]->(p:Project)\n"
             + "RETURN c.name, collect(DISTINCT p.name) AS projects"
-        )
+        ), params
     return None
 
 
-def handle_followup(user_query, driver, llm, schema, memory):
-    history = memory.load_memory_variables({})
-    # print(f"[DEBUG] [handle_followup] Raw history: {history}")
-    last_result = ""
-    names = set()
-    if history and 'history' in history and history['history']:
-        messages = history['history']
-        print(f"[DEBUG] [handle_followup] Messages: {messages}")
-       
-        # Find the last AI message with candidate names (not emails)
-        for i in range(len(messages) - 1, -1, -1):
-            msg = messages[i]
-            if hasattr(msg, 'type') and msg.type == 'ai':
-                content = getattr(msg, 'content', '')
-            elif isinstance(msg, dict) and msg.get("type") == "ai":
-                content = msg.get("content", "")
-            else:
+_CLAUSE = re.compile(
+    r"(OPTIONAL\s+MATCH|MATCH|WHERE|WITH|RETURN|UNWIND|CALL|ORDER\s+BY|SKIP|LIMIT|UNION|"
+    r"CREATE|MERGE|SET|DELETE|DETACH|REMOVE|FOREACH)\b",
+    re.IGNORECASE,
+)
+_CANDIDATE_PATTERN = re.compile(r"\(\s*c\s*:\s*Candidate\b")
+
+
+def _top_level_clauses(cypher):
+    """[(start, end, keyword)] of clause keywords outside strings, comments
+    and brackets; ``end`` is where the keyword itself ends."""
+    clauses = []
+    depth = 0
+    i = 0
+    while i < len(cypher):
+        ch = cypher[i]
+        if ch in "'\"`":
+            close = cypher.find(ch, i + 1)
+            while close != -1 and ch != "`" and cypher[close - 1] == "\\":
+                close = cypher.find(ch, close + 1)
+            i = len(cypher) if close == -1 else close + 1
+            continue
+        if cypher.startswith("//", i):
+            close = cypher.find("\n", i)
+            i = len(cypher) if close == -1 else close
+            continue
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        elif depth == 0 and (i == 0 or not (cypher[i - 1].isalnum() or cypher[i - 1] in "_$.")):
+            match = _CLAUSE.match(cypher, i)
+            if match:
+                clauses.append((i, match.end(), " ".join(match.group(1).upper().split())))
+                i = match.end()
                 continue
-            # Heuristic: look for 'c.name' in the content (candidate name result)
-            if 'c.name' in content:
-                last_result = content
-                print(f"[DEBUG] [handle_followup] Found last AI message with candidate names 'from mongodb to memory': {last_result}")
-                if last_result.startswith("Query result:"):
-                    last_result = last_result[len("Query result:"):].strip()
-                break
-        print(f"[DEBUG] [handle_followup] last_result after prefix strip: {last_result}")
-    else:
-        print(f"[DEBUG] [handle_followup] No valid messages in history.")
-
-    import json, re
-    # print(f"[DEBUG] [handle_followup] last_result string: {last_result}")
-    json_start = None
-    for i, ch in enumerate(last_result):
-        if ch == '{' or ch == '[':
-            json_start = i
-            break
-    candidate_text = last_result[json_start:] if json_start is not None else last_result
-    print(f"[DEBUG] [handle_followup] candidate_text string: {candidate_text}")
-    parsed = None
-    try:
-        parsed = json.loads(candidate_text)
-        print(f"[DEBUG] [handle_followup] Successfully parsed candidate_text as JSON.")
-    except Exception as e_json:
-        print(f"[DEBUG] [handle_followup] JSON parsing failed: {e_json}")
-
-    if isinstance(parsed, list):
-        for item in parsed:
-            if isinstance(item, dict):
-                for k, v in item.items():
-                    if (k.lower() == 'name' or k.lower().endswith('.name')) and isinstance(v, str):
-                        names.add(v)
-    if not names:
-        for match in re.finditer(r"['\"]c?\.?\.?name['\"]?\s*:\s*['\"]([^'\"]+)['\"]", candidate_text):
-            names.add(match.group(1))
-    print(f"[DEBUG] [handle_followup] Extracted candidate names: {names}")
-    if names:
-        print(f"[DEBUG] [handle_followup] Successfully parsed candidate names for followup from history and sending to build_follow_up: {names}")
-        cypher = build_followup_cypher(names, user_query)
-        if cypher is None:
-            base_cypher = candidate_query_to_cypher(user_query, schema, llm)
-            names_literal = ", ".join([f'"{n}"' if "'" in n else f"'{n}'" for n in names])
-            lines = base_cypher.split("\n")
-            injected = False
-            for idx, line in enumerate(lines):
-                if "MATCH" in line and "(c:Candidate" in line.replace(" ", "") and not injected:
-                    if "WHERE" in line:
-                        parts = line.split("WHERE",1)
-                        lines[idx] = f"{parts[0]}WHERE c.name IN [{names_literal}] AND {parts[1].strip()}"
-                    else:
-                        lines.insert(idx+1, f"WHERE c.name IN [{names_literal}]")
-                    injected = True
-            if not injected:
-                lines.append(f"WHERE c.name IN [{names_literal}]")
-            cypher = "\n".join(lines)
-    else:
-        print(f"[DEBUG] [handle_followup] No candidate names found; treating as standalone query.")
-        cypher = candidate_query_to_cypher(user_query, schema, llm)
-    print(f"[DEBUG] [handle_followup] Generated Cypher for follow-up after failing to hanlde from handle_foloowup and sending to base cypher geenrater.:\n{cypher}")
-    result = run_cypher(cypher, driver)
-    return result
-    
+        i += 1
+    return clauses
+
 
+def inject_candidate_filter(base_cypher):
+    """Restrict the first MATCH that binds (c:Candidate) to $names/$candidates.
 
+    The filter joins that MATCH's own WHERE clause (wherever it sits) with the
+    original predicate parenthesised, or becomes a new WHERE right after the
+    pattern. A query without such a MATCH is returned unchanged.
+    """
+    clauses = _top_level_clauses(base_cypher)
+    for n, (start, end, keyword) in enumerate(clauses):
+        if keyword not in ("MATCH", "OPTIONAL MATCH"):
+            continue
+        stop = clauses[n + 1][0] if n + 1 < len(clauses) else len(base_cypher)
+        if not _CANDIDATE_PATTERN.search(base_cypher, end, stop):
+            continue
+        following = clauses[n + 1] if n + 1 < len(clauses) else None
+        if following is not None and following[2] == "WHERE":
+            pred_start = following[1]
+            pred_stop = clauses[n + 2][0] if n + 2 < len(clauses) else len(base_cypher)
+            predicate = base_cypher[pred_start:pred_stop]
+            trailing = predicate[len(predicate.rstrip()):]
+            return (base_cypher[:pred_start] + f" {CANDIDATE_FILTER} AND ({predicate.strip()})"
+                    + trailing + base_cypher[pred_stop:])
+        pattern = base_cypher[:stop].rstrip()
+        return pattern + f"\nWHERE {CANDIDATE_FILTER}" + base_cypher[len(pattern):]
+    logger.warning("no (c:Candidate) MATCH to filter; follow-up runs unfiltered",
+                   extra={"cypher": base_cypher})
+    return base_cypher
 
 
+def handle_followup(user_query, driver, llm, schema, session_id="default", base_cypher=None):
+    # Candidates from the previous answer are kept as a structured record,
+    # so nothing has to be scanned or parsed out of the conversation text.
+    candidates = get_last_candidates(session_id)
+    logger.debug("follow-up candidates", extra={"session_id": session_id, "candidates": len(candidates)})
+    if candidates:
+        params = candidate_filter_params(candidates)
+        followup = build_followup_cypher(candidates, user_query)
+        if followup is not None:
+            cypher, params = followup
+        else:
+            base_cypher = base_cypher or candidate_query_to_cypher(user_query, schema, llm)
+            cypher = inject_candidate_filter(base_cypher)
+    else:
+        logger.debug("no previous candidates; answering as a standalone query",
+                     extra={"session_id": session_id})
+        params = None
+        cypher = base_cypher or candidate_query_to_cypher(user_query, schema, llm)
+    logger.debug("follow-up cypher", extra={"cypher": cypher})
+    # Lazy, row-capped pages; callers decide how much of it to read
+    return stream_cypher(cypher, driver, params)
+
 
+async def aplan_followup(user_query, llm, schema, session_id="default", base_cypher=None):
+    """Async counterpart of handle_followup; returns (cypher, params) to run."""
+    candidates = get_last_candidates(session_id)
+    if candidates:
+        followup = build_followup_cypher(candidates, user_query)
+        if followup is not None:
+            return followup
+        base_cypher = base_cypher or await acandidate_query_to_cypher(user_query, schema, llm)
+        return inject_candidate_filter(base_cypher), candidate_filter_params(candidates)
+    return base_cypher or await acandidate_query_to_cypher(user_query, schema, llm), None
@@ -0,0 +1,22 @@
+from utils.canonicalize import rewrite_skill_filters
+
+
+def test_known_skill_matches_canonical_name_and_keeps_contains_fallback():
+    cypher = 'MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill) WHERE s.name_search CONTAINS "python3" RETURN c.name'
+
+    assert rewrite_skill_filters(cypher) == (
+        'MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill) '
+        'WHERE (s.name = "Python" OR s.name_search CONTAINS "python3") RETURN c.name'
+    )
+
+
+def test_unknown_skill_is_left_alone():
+    cypher = 'MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill) WHERE s.name_search CONTAINS "zzqx" RETURN c.name'
+
+    assert rewrite_skill_filters(cypher) == cypher
+
+
+def test_filters_on_other_labels_are_left_alone():
+    cypher = 'MATCH (c:Candidate)-[:HAS_PROJECT_ON]->(p:Project) WHERE p.name_search CONTAINS "python" RETURN c.name'
+
+    assert rewrite_skill_filters(cypher) == cypher
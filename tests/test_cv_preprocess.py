@@ -0,0 +1,60 @@
+from utils.cv_preprocess import count_tokens, merge_extractions, preprocess_cv
+
+
+def test_headingless_cv_over_budget_is_split_into_chunks():
+    lines = [f"line {i} of a resume without any recognised headings" for i in range(3000)]
+    result = preprocess_cv(["\n".join(lines)], token_budget=2000)
+
+    assert len(result["chunks"]) > 1
+    assert all(count_tokens(chunk) <= 2000 for chunk in result["chunks"])
+    assert "\n".join(result["chunks"]).splitlines() == lines
+
+
+def test_non_empty_text_always_has_a_chunk():
+    assert preprocess_cv(["Jane Doe"], token_budget=1)["chunks"] == ["Jane Doe"]
+
+
+def test_year_lines_are_not_page_numbers():
+    page = "Jane Doe\nExperience\nAcme Corp\n2019\nSoftware Engineer\n2021\nMore text\n3\nEnd of page"
+    text = preprocess_cv([page])["text"]
+
+    assert "2019" in text.splitlines()
+    assert "2021" in text.splitlines()
+    # "3" sits near the page edge but is larger than the page count
+    assert "3" in text.splitlines()
+
+
+def test_page_numbers_at_page_edges_are_dropped():
+    pages = ["1\nJane Doe\nSkills\nPython\nSQL\nDocker\nAWS", "Go\nJava\nReact\nC++\nRust\nPage 2 of 2"]
+    lines = preprocess_cv(pages)["text"].splitlines()
+
+    assert "1" not in lines
+    assert "Page 2 of 2" not in lines
+    assert "Rust" in lines
+
+
+def test_repeated_header_kept_once_but_repeated_content_kept():
+    page1 = "Jane Doe | jane@example.com\nExperience\nAcme\nBuilt things\nShipped stuff\nSoftware Engineer"
+    page2 = "Jane Doe | jane@example.com\nSoftware Engineer\nGlobex\nBuilt more things\nLed a team\nMentored"
+    lines = preprocess_cv([page1, page2])["text"].splitlines()
+
+    assert lines.count("Jane Doe | jane@example.com") == 1
+    assert lines.count("Software Engineer") == 2
+
+
+def test_chunks_repeat_the_header():
+    body = "\n".join(f"Company {i}, engineer, built systems" for i in range(400))
+    result = preprocess_cv([f"Jane Doe\njane@example.com\nExperience\n{body}"], token_budget=500)
+
+    assert len(result["chunks"]) > 1
+    assert all(chunk.startswith("Jane Doe\njane@example.com") for chunk in result["chunks"])
+
+
+def test_merge_extractions_keeps_first_scalar_and_dedupes_lists():
+    merged = merge_extractions([
+        {"name": "Jane", "email": None, "skills": [{"name": "Python"}]},
+        {"name": "Other", "email": "jane@example.com", "skills": [{"name": "Python"}, {"name": "Go"}]},
+    ])
+
+    assert merged == {"name": "Jane", "email": "jane@example.com",
+                      "skills": [{"name": "Python"}, {"name": "Go"}]}
@@ -0,0 +1,69 @@
+import pytest
+
+from utils.cypher_params import parameterize_cypher
+
+
+def test_string_and_number_literals_become_parameters():
+    cypher, params = parameterize_cypher(
+        'MATCH (c:Candidate)-[:WORKED_IN]->(w:Work) WHERE w.company_search CONTAINS "acme" '
+        "AND w.years >= 3 RETURN c.name LIMIT 10"
+    )
+
+    assert cypher == ("MATCH (c:Candidate)-[:WORKED_IN]->(w:Work) WHERE w.company_search CONTAINS $lit_0 "
+                      "AND w.years >= $lit_1 RETURN c.name LIMIT $lit_2")
+    assert params == {"lit_0": "acme", "lit_1": 3, "lit_2": 10}
+
+
+def test_same_shape_queries_share_text():
+    first, _ = parameterize_cypher("MATCH (s:Skill) WHERE s.name_search = 'python' RETURN s")
+    second, _ = parameterize_cypher("MATCH (s:Skill) WHERE s.name_search = 'java' RETURN s")
+
+    assert first == second
+
+
+def test_repeated_values_share_one_parameter():
+    cypher, params = parameterize_cypher("RETURN 'x' AS a, 'x' AS b")
+
+    assert cypher == "RETURN $lit_0 AS a, $lit_0 AS b"
+    assert params == {"lit_0": "x"}
+
+
+def test_escapes_backticks_and_comments_are_respected():
+    cypher, params = parameterize_cypher(
+        "MATCH (n:`Odd 'label`) // it's a comment\nWHERE n.name = 'o\\'brien' RETURN n"
+    )
+
+    assert cypher == "MATCH (n:`Odd 'label`) // it's a comment\nWHERE n.name = $lit_0 RETURN n"
+    assert params == {"lit_0": "o'brien"}
+
+
+def test_numbers_inside_identifiers_are_left_alone():
+    cypher, params = parameterize_cypher("MATCH (c1:Candidate) RETURN c1.name")
+
+    assert cypher == "MATCH (c1:Candidate) RETURN c1.name"
+    assert params == {}
+
+
+def test_existing_params_are_kept_and_not_clobbered():
+    cypher, params = parameterize_cypher("MATCH (c) WHERE c.name IN $names AND c.x = 'y' RETURN c",
+                                         {"names": ["a"], "lit_0": "taken"})
+
+    assert params["names"] == ["a"]
+    assert params["lit_0"] == "taken"
+    assert cypher.endswith("c.x = $lit_0_ RETURN c")
+    assert params["lit_0_"] == "y"
+
+
+def test_unterminated_string_raises():
+    with pytest.raises(ValueError):
+        parameterize_cypher("MATCH (c) WHERE c.name CONTAINS 'o'brien' RETURN c")
+
+
+def test_stream_cypher_falls_back_to_the_original_query():
+    from utils import llm_query_helpers
+
+    cypher = "MATCH (c) WHERE c.name CONTAINS 'o'brien' RETURN c"
+    pages = llm_query_helpers.stream_cypher(cypher, driver=None)
+
+    assert pages.cypher_query == cypher
+    assert pages.params == {}
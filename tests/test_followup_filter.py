@@ -0,0 +1,49 @@
+from memory_cypher_chain import CANDIDATE_FILTER, inject_candidate_filter
+
+
+def test_where_on_the_match_line_keeps_return_outside_the_parentheses():
+    cypher = 'MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill) WHERE s.name_search CONTAINS "p" RETURN c.name'
+
+    assert inject_candidate_filter(cypher) == (
+        f'MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill) WHERE {CANDIDATE_FILTER} '
+        f'AND (s.name_search CONTAINS "p") RETURN c.name'
+    )
+
+
+def test_where_on_the_next_line_is_extended_not_duplicated():
+    cypher = ('MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill)\n'
+              'WHERE s.name_search CONTAINS "python" OR s.name_search CONTAINS "java"\n'
+              'RETURN DISTINCT c.name, c.email')
+
+    result = inject_candidate_filter(cypher)
+
+    assert result.count("WHERE") == cypher.count("WHERE") + 1  # the one inside any(...)
+    assert result.splitlines()[1] == (
+        f'WHERE {CANDIDATE_FILTER} AND (s.name_search CONTAINS "python" OR s.name_search CONTAINS "java")'
+    )
+    assert result.splitlines()[2] == "RETURN DISTINCT c.name, c.email"
+
+
+def test_match_without_where_gets_one_before_return():
+    cypher = "MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill)\nRETURN c.name, collect(s.name) AS skills"
+
+    assert inject_candidate_filter(cypher) == (
+        f"MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill)\nWHERE {CANDIDATE_FILTER}\n"
+        "RETURN c.name, collect(s.name) AS skills"
+    )
+
+
+def test_nested_where_and_later_match_are_left_alone():
+    cypher = ("MATCH (w:Work)\nMATCH (c:Candidate)-[:WORKED_IN]->(w) "
+              "WHERE size([x IN c.tags WHERE x = 'a']) > 0\nRETURN c.name")
+
+    result = inject_candidate_filter(cypher)
+
+    assert result.startswith("MATCH (w:Work)\nMATCH (c:Candidate)-[:WORKED_IN]->(w) WHERE ")
+    assert result.endswith("AND (size([x IN c.tags WHERE x = 'a']) > 0)\nRETURN c.name")
+
+
+def test_query_without_a_candidate_match_is_unchanged():
+    cypher = "MATCH (s:Skill) RETURN s.name"
+
+    assert inject_candidate_filter(cypher) == cypher
@@ -0,0 +1,29 @@
+import pytest
+
+from utils.intent_classifier import INTENT_CONFIDENCE_THRESHOLD, classify_query_type
+
+
+@pytest.mark.parametrize("query", [
+    "how does this work?",
+    "thanks for the candidates",
+    "bye, great work",
+    "what is your experience",
+    "ok show those",
+])
+def test_small_talk_mixed_with_candidate_words_is_left_to_the_llm(query):
+    _, confidence = classify_query_type(query)
+
+    assert confidence < INTENT_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("query", [
+    "who worked at google",
+    "candidates with 3 years of experience",
+    "find python developers",
+])
+def test_searches_take_the_fast_path(query):
+    assert classify_query_type(query) == ("candidate", 0.9)
+
+
+def test_plain_greeting_takes_the_fast_path():
+    assert classify_query_type("hello") == ("conversation", 0.95)
@@ -0,0 +1,198 @@
+"""Merge spelling variants of skills and projects into one canonical node.
+
+"Python", "python3" and "Python " should all be the same Skill. At ingest each
+raw name is resolved in order by:
+
+1. the alias dictionary below,
+2. an exact match on the normalized key of a name we already know,
+3. a character-trigram similarity index over known names (catches typos),
+
+and otherwise becomes a new canonical name. The raw spelling is kept on the
+relationship and in the node's ``aliases`` list.
+"""
+import re
+import threading
+
+from utils.search_text import normalize_search_text
+
+# normalized alias -> canonical display name
+SKILL_ALIASES = {
+    "python3": "Python", "python 3": "Python", "py": "Python",
+    "js": "JavaScript", "javascript": "JavaScript", "java script": "JavaScript", "es6": "JavaScript",
+    "ts": "TypeScript", "typescript": "TypeScript",
+    "node": "Node.js", "nodejs": "Node.js", "node js": "Node.js", "node.js": "Node.js",
+    "react": "React", "reactjs": "React", "react.js": "React", "react js": "React",
+    "vue": "Vue.js", "vuejs": "Vue.js", "vue.js": "Vue.js",
+    "angularjs": "Angular", "angular.js": "Angular",
+    "nextjs": "Next.js", "next.js": "Next.js", "next js": "Next.js",
+    "golang": "Go", "go lang": "Go",
+    "cpp": "C++", "c plus plus": "C++", "c++": "C++",
+    "csharp": "C#", "c sharp": "C#", "c#": "C#",
+    "postgres": "PostgreSQL", "postgresql": "PostgreSQL", "postgre sql": "PostgreSQL",
+    "mongo": "MongoDB", "mongodb": "MongoDB", "mongo db": "MongoDB",
+    "mysql": "MySQL", "my sql": "MySQL",
+    "k8s": "Kubernetes", "kubernetes": "Kubernetes",
+    "aws": "AWS", "amazon web services": "AWS",
+    "gcp": "Google Cloud", "google cloud platform": "Google Cloud",
+    "ml": "Machine Learning", "machine learning": "Machine Learning",
+    "dl": "Deep Learning", "deep learning": "Deep Learning",
+    "ai": "Artificial Intelligence", "artificial intelligence": "Artificial Intelligence",
+    "nlp": "Natural Language Processing", "natural language processing": "Natural Language Processing",
+    "tf": "TensorFlow", "tensorflow": "TensorFlow",
+    "sklearn": "scikit-learn", "scikit learn": "scikit-learn", "scikit-learn": "scikit-learn",
+    "html5": "HTML", "html": "HTML", "css3": "CSS", "css": "CSS",
+    "git": "Git", "github": "GitHub", "docker": "Docker",
+}
+
+SKILL_SIMILARITY_THRESHOLD = 0.8
+PROJECT_SIMILARITY_THRESHOLD = 0.9
+
+
+def canonical_key(name):
+    """Normalized lookup key: lowercase, single spaces, no edge punctuation."""
+    key = normalize_search_text(name) or ""
+    return key.strip(" .,;:-_/")
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Inverted trigram index for Jaccard nearest-name lookups."""
+
+    def __init__(self):
+        self._grams = {}      # key -> set of trigrams
+        self._postings = {}   # trigram -> set of keys
+
+    def add(self, key):
+        if key in self._grams:
+            return
+        grams = _trigrams(key)
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def best_match(self, key, threshold):
+        grams = _trigrams(key)
+        overlap = {}
+        for gram in grams:
+            for other in self._postings.get(gram, ()):
+                overlap[other] = overlap.get(other, 0) + 1
+        best, best_score = None, threshold
+        for other, shared in overlap.items():
+            score = shared / (len(grams) + len(self._grams[other]) - shared)
+            if score >= best_score:
+                best, best_score = other, score
+        return best
+
+
+class Canonicalizer:
+    def __init__(self, aliases=None, threshold=SKILL_SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._aliases = {canonical_key(k): v for k, v in (aliases or {}).items()}
+        self._names = {}  # key -> canonical display name
+        self._index = TrigramIndex()
+        self._lock = threading.Lock()
+        for canonical in set(self._aliases.values()):
+            self._register(canonical)
+
+    def _register(self, name):
+        key = canonical_key(name)
+        if key and key not in self._names:
+            self._names[key] = name.strip()
+            self._index.add(key)
+
+    def add_known(self, names):
+        with self._lock:
+            for name in names:
+                if name:
+                    self._register(self._aliases.get(canonical_key(name), name))
+
+    def lookup(self, name):
+        """Canonical name for a known alias or name, without registering anything."""
+        key = canonical_key(name)
+        with self._lock:
+            if key in self._aliases:
+                return self._aliases[key]
+            return self._names.get(key)
+
+    def canonicalize(self, raw):
+        key = canonical_key(raw)
+        if not key:
+            return raw
+        with self._lock:
+            if key in self._aliases:
+                return self._aliases[key]
+            if key in self._names:
+                return self._names[key]
+            match = self._index.best_match(key, self.threshold)
+            if match is not None:
+                return self._names[match]
+            self._register(raw)
+            return self._names[key]
+
+
+skills = Canonicalizer(SKILL_ALIASES, SKILL_SIMILARITY_THRESHOLD)
+projects = Canonicalizer(threshold=PROJECT_SIMILARITY_THRESHOLD)
+
+_loaded = False
+_loaded_lock = threading.Lock()
+
+
+def load_known_names(driver):
+    """Seed the indexes with Skill and Project names already in the graph (once)."""
+    global _loaded
+    with _loaded_lock:
+        if _loaded:
+            return
+        with driver.session() as session:
+            skills.add_known(r["name"] for r in session.run("MATCH (s:Skill) RETURN s.name AS name"))
+            projects.add_known(r["name"] for r in session.run("MATCH (p:Project) RETURN p.name AS name"))
+        _loaded = True
+
+
+def canonicalize_items(items, canonicalizer):
+    """Replace item names with canonical ones, merging items that collapse together.
+
+    Each returned item has ``name`` (canonical), ``raw_name`` (first spelling
+    seen) and ``raw_names`` (every spelling seen for this candidate).
+    """
+    merged = {}
+    for item in items:
+        raw = str(item["name"]).strip()
+        name = canonicalizer.canonicalize(raw)
+        if name in merged:
+            if raw not in merged[name]["raw_names"]:
+                merged[name]["raw_names"].append(raw)
+            continue
+        merged[name] = {**item, "name": name, "raw_name": raw, "raw_names": [raw]}
+    return list(merged.values())
+
+
+_SKILL_VAR = re.compile(r"\(\s*(\w+)\s*:\s*Skill\b")
+_SKILL_FILTER = r"\b{var}\.name_search\s+CONTAINS\s+\"((?:[^\"\\\\]|\\\\.)*)\""
+
+
+def rewrite_skill_filters(cypher):
+    """Widen CONTAINS filters on Skill names to the canonical skill as well.
+
+    A keyword that resolves to a known skill (directly or via an alias, e.g.
+    "python3") also matches the canonical node through the unique ``skill_key``
+    constraint on ``name``. The original CONTAINS stays as an OR fallback so
+    variant nodes from before canonicalization and compound skills
+    ("Python/Django") are still found.
+    """
+    for var in set(_SKILL_VAR.findall(cypher)):
+        pattern = re.compile(_SKILL_FILTER.format(var=re.escape(var)))
+
+        def replace(match):
+            canonical = skills.lookup(match.group(1))
+            if canonical is None:
+                return match.group(0)
+            name = canonical.replace("\\", "\\\\").replace('"', '\\"')
+            return f'({var}.name = "{name}" OR {match.group(0)})'
+
+        cypher = pattern.sub(replace, cypher)
+    return cypher
@@ -0,0 +1,193 @@
+"""Process-wide Neo4j driver and MongoDB client.
+
+Each is created once per process on first use and shared by the Streamlit
+app (across reruns and sessions), ingestion and the memory chain. Both own a
+connection pool, so creating them per rerun or per module leaks pools.
+"""
+import atexit
+import os
+import threading
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+from pymongo import MongoClient, monitoring
+
+load_dotenv()
+
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "60"))
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+
+_lock = threading.Lock()
+_neo4j_driver = None
+_mongo_client = None
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name, delta=1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + delta
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+
+_neo4j_counters = _Counters()
+_mongo_counters = _Counters()
+
+
+class _TrackedSession:
+    """Neo4j session wrapper that keeps the open-session gauge accurate."""
+
+    def __init__(self, session):
+        self._session = session
+        self._closed = False
+        _neo4j_counters.add("sessions_open")
+        _neo4j_counters.add("sessions_opened_total")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            _neo4j_counters.add("sessions_open", -1)
+            self._session.close()
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+class _TrackedDriver:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def session(self, **kwargs):
+        return _TrackedSession(self._driver.session(**kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+
+class _MongoPoolListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        _mongo_counters.add("pool_cleared_total")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        _mongo_counters.add("connections_open")
+        _mongo_counters.add("connections_created_total")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        _mongo_counters.add("connections_open", -1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        _mongo_counters.add("checkout_failed_total")
+
+    def connection_checked_out(self, event):
+        _mongo_counters.add("connections_in_use")
+
+    def connection_checked_in(self, event):
+        _mongo_counters.add("connections_in_use", -1)
+
+
+def get_neo4j_driver():
+    global _neo4j_driver
+    with _lock:
+        if _neo4j_driver is None:
+            uri = os.getenv("NEO4J_URI")
+            user = os.getenv("NEO4J_USER")
+            password = os.getenv("NEO4J_PASSWORD")
+            if not all([uri, user, password]):
+                raise ValueError("NEO4J_URI, NEO4J_USER, and NEO4J_PASSWORD environment variables must be set.")
+            _neo4j_driver = _TrackedDriver(GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+                connection_acquisition_timeout=NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+            ))
+        return _neo4j_driver
+
+
+def get_mongo_client():
+    global _mongo_client
+    with _lock:
+        if _mongo_client is None:
+            _mongo_client = MongoClient(
+                os.getenv("MONGODB_URI"),
+                maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                minPoolSize=MONGODB_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+                event_listeners=[_MongoPoolListener()],
+            )
+        return _mongo_client
+
+
+def get_mongo_db():
+    db_name = os.getenv("MONGODB_DB_NAME")
+    if not db_name:
+        raise ValueError("MONGODB_DB_NAME environment variable must be set.")
+    return get_mongo_client()[db_name]
+
+
+def health_check():
+    """Ping both backends; returns {"neo4j": (ok, error), "mongodb": (ok, error)}."""
+    status = {}
+    try:
+        get_neo4j_driver().verify_connectivity()
+        status["neo4j"] = (True, None)
+    except Exception as e:
+        status["neo4j"] = (False, str(e))
+    try:
+        get_mongo_client().admin.command("ping")
+        status["mongodb"] = (True, None)
+    except Exception as e:
+        status["mongodb"] = (False, str(e))
+    return status
+
+
+def pool_metrics():
+    return {
+        "neo4j": {"max_pool_size": NEO4J_MAX_POOL_SIZE, **_neo4j_counters.snapshot()},
+        "mongodb": {"max_pool_size": MONGODB_MAX_POOL_SIZE, **_mongo_counters.snapshot()},
+    }
+
+
+def close_all():
+    global _neo4j_driver, _mongo_client
+    with _lock:
+        if _neo4j_driver is not None:
+            _neo4j_driver.close()
+            _neo4j_driver = None
+        if _mongo_client is not None:
+            _mongo_client.close()
+            _mongo_client = None
+
+
+atexit.register(close_all)
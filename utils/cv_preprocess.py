@@ -0,0 +1,239 @@
+"""Shrink raw CV text before it is sent to the extraction prompt.
+
+PDF text comes with page furniture: runs of spaces, blank lines, page numbers,
+and the same header/footer on every page. ``preprocess_cv``
+
+- collapses whitespace and drops page-number lines (a bare number at the top
+  or bottom of a page, no larger than the page count, so years stay),
+- keeps the first copy of a line that repeats at the top (or at the bottom)
+  of most pages, usually the name/contact header, and drops its later copies
+  at that edge; the same text anywhere else is kept,
+- finds the resume sections (education, experience, skills, ...),
+- and, when the result is still over the token budget, splits it into
+  chunks on section boundaries. Every chunk starts with the text before the
+  first section, so each extraction still sees the name and email.
+
+Per-chunk extractions are combined with ``merge_extractions``.
+"""
+import json
+import os
+import re
+import threading
+from collections import Counter
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CV_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", "6000"))
+# Header/footer detection looks at this many lines at each end of a page.
+EDGE_LINES = 3
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to a character estimate
+    tiktoken = None
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    # Loaded on first use, not at import: on a cold cache tiktoken downloads
+    # the BPE file, which must not hold up app start-up.
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base") if tiktoken else None
+            except Exception:  # the encoding file cannot be fetched
+                _encoding = None
+            _encoding_loaded = True
+        return _encoding
+
+
+def count_tokens(text):
+    """Token count for budgeting. cl100k is an approximation of Gemini's
+    tokenizer; without tiktoken, fall back to ~4 characters per token."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // 4)
+
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "about me", "professional summary", "career objective"],
+    "education": ["education", "academic background", "academic qualifications", "qualifications"],
+    "experience": ["experience", "work experience", "professional experience", "employment history",
+                   "work history", "internships", "internship"],
+    "skills": ["skills", "technical skills", "core competencies", "technologies", "tools", "key skills"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "activities": ["activities", "extracurricular activities", "volunteering", "leadership", "achievements",
+                   "awards", "certifications", "certificates"],
+    "references": ["references", "referees"],
+}
+# Sections that never contribute to the extracted fields
+DROP_SECTIONS = {"references"}
+
+_HEADING_LOOKUP = {h: section for section, headings in SECTION_HEADINGS.items() for h in headings}
+_PAGE_NUMBER = re.compile(r"^(?:page\s*)?(\d+)(?:\s*(?:/|of)\s*\d+)?$", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t\u00a0\u200b]+")
+
+
+def _edge(index, count):
+    """"top" or "bottom" when the line sits at a page edge, else None."""
+    if index < EDGE_LINES:
+        return "top"
+    if index >= count - EDGE_LINES:
+        return "bottom"
+    return None
+
+
+def _is_page_number(line, page_count):
+    match = _PAGE_NUMBER.match(line)
+    return bool(match) and 0 < int(match.group(1)) <= page_count
+
+
+def _clean_lines(page, page_count=1):
+    lines = [_SPACES.sub(" ", line).strip() for line in page.splitlines()]
+    lines = [line for line in lines if line]
+    # Only a number at a page edge is a page number; "2019" mid-page is a date
+    return [line for i, line in enumerate(lines)
+            if not (_edge(i, len(lines)) and _is_page_number(line, page_count))]
+
+
+def _repeated_edge_lines(pages):
+    """{(edge, line)} for lines repeated at the same edge of most pages."""
+    if len(pages) < 2:
+        return set()
+    seen = Counter()
+    for lines in pages:
+        seen.update({(_edge(i, len(lines)), line) for i, line in enumerate(lines) if _edge(i, len(lines))})
+    threshold = max(2, (len(pages) + 1) // 2)
+    return {key for key, count in seen.items() if count >= threshold}
+
+
+def section_of(line):
+    """Section name if ``line`` looks like a heading, else None."""
+    key = line.lower().strip(" :-|•*#").strip()
+    if len(key) > 40:
+        return None
+    return _HEADING_LOOKUP.get(key)
+
+
+def split_sections(lines):
+    """[(section, lines)] in document order; text before the first heading is "header"."""
+    sections = [("header", [])]
+    for line in lines:
+        section = section_of(line)
+        if section is not None:
+            sections.append((section, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, body) for name, body in sections if body]
+
+
+def _pack(items, room, separator):
+    """Group ``(text, tokens)`` items into runs that fit ``room``.
+
+    Keeps a running total (item tokens plus one per separator) rather than
+    re-counting the joined text, so packing stays linear in the input.
+    """
+    groups, current, used = [], [], 0
+    for text, tokens in items:
+        if current and used + 1 + tokens > room:
+            groups.append(separator.join(current))
+            current, used = [], 0
+        used += tokens + (1 if current else 0)
+        current.append(text)
+    if current:
+        groups.append(separator.join(current))
+    return groups
+
+
+def _chunk(header, sections, budget):
+    if not sections:
+        # No headings recognised: everything is "header", so split it by lines
+        return _pack(((line, count_tokens(line)) for line in header), budget, "\n")
+    header_text = "\n".join(header)
+    room = max(budget - count_tokens(header_text), budget // 4)
+    pieces = []
+    for _, body in sections:
+        text = "\n".join(body)
+        tokens = count_tokens(text)
+        if tokens <= room:
+            pieces.append((text, tokens))
+            continue
+        # One section over budget on its own: split it by lines
+        for piece in _pack(((line, count_tokens(line)) for line in body), room, "\n"):
+            pieces.append((piece, count_tokens(piece)))
+
+    chunks = _pack(pieces, room, "\n\n")
+    return ["\n\n".join([header_text, chunk]) if header_text else chunk for chunk in chunks]
+
+
+def preprocess_cv(pages, token_budget=None):
+    """Clean a CV given as a list of page texts (or one string).
+
+    Returns ``{"text", "chunks", "sections", "tokens_before", "tokens_after"}``.
+    ``chunks`` holds a single entry unless the text is over ``token_budget``.
+    """
+    token_budget = token_budget or CV_TOKEN_BUDGET
+    if isinstance(pages, str):
+        pages = pages.split("\f")
+    tokens_before = count_tokens("\n".join(pages))
+
+    page_lines = [_clean_lines(page, len(pages)) for page in pages]
+    repeated = _repeated_edge_lines(page_lines)
+    lines, kept = [], set()
+    for page in page_lines:
+        for i, line in enumerate(page):
+            key = (_edge(i, len(page)), line)
+            if key in repeated:
+                if key in kept:
+                    continue
+                kept.add(key)
+            lines.append(line)
+
+    sections = [(name, body) for name, body in split_sections(lines) if name not in DROP_SECTIONS]
+    text = "\n\n".join("\n".join(body) for _, body in sections)
+    tokens_after = count_tokens(text)
+
+    if tokens_after <= token_budget:
+        chunks = [text]
+    else:
+        header = sections[0][1] if sections and sections[0][0] == "header" else []
+        body_sections = sections[1:] if header else sections
+        chunks = _chunk(header, body_sections, token_budget) or [text]
+
+    return {
+        "text": text,
+        "chunks": chunks,
+        "sections": [name for name, _ in sections],
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+    }
+
+
+def merge_extractions(results):
+    """Combine per-chunk extraction dicts: first non-empty scalar wins, lists are
+    concatenated with exact duplicates removed."""
+    merged = {}
+    for result in results:
+        for key, value in (result or {}).items():
+            if isinstance(value, list):
+                items = merged.setdefault(key, [])
+                seen = {json.dumps(item, sort_keys=True, default=str) for item in items}
+                for item in value:
+                    marker = json.dumps(item, sort_keys=True, default=str)
+                    if marker not in seen:
+                        seen.add(marker)
+                        items.append(item)
+            elif merged.get(key) in (None, "") and value not in (None, ""):
+                merged[key] = value
+            else:
+                merged.setdefault(key, value)
+    return merged
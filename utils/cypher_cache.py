@@ -0,0 +1,108 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from utils.lru_cache import LRUCache
+
+load_dotenv()
+
+CYPHER_CACHE_SIZE = int(os.getenv("CYPHER_CACHE_SIZE", "2048"))
+CYPHER_CACHE_TTL = float(os.getenv("CYPHER_CACHE_TTL", "86400"))
+# Empty -> memory only. Set to a file path to keep translations across restarts.
+CYPHER_CACHE_PATH = os.getenv("CYPHER_CACHE_PATH", "")
+
+
+def normalize_query(user_query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    query = " ".join((user_query or "").lower().split())
+    return re.sub(r"[\s?.!]+$", "", query)
+
+
+def translation_key(user_query: str, schema: str) -> str:
+    # Changing the schema string changes the key, so stale translations for
+    # an old schema are simply never looked up again.
+    schema_hash = hashlib.sha256((schema or "").encode("utf-8")).hexdigest()[:16]
+    return f"{schema_hash}:{normalize_query(user_query)}"
+
+
+class CypherTranslationCache:
+    """LRU + TTL cache of natural-language query -> Cypher translations.
+
+    With ``path`` set, entries are also written to SQLite and read back on a
+    memory miss, so recurring questions survive a restart.
+    """
+
+    def __init__(self, maxsize=CYPHER_CACHE_SIZE, ttl=CYPHER_CACHE_TTL, path=CYPHER_CACHE_PATH):
+        self.ttl = ttl
+        self._memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._conn = None
+        self._lock = threading.Lock()
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY, cypher TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, user_query, schema):
+        key = translation_key(user_query, schema)
+        cypher = self._memory.get(key)
+        if cypher is not None or self._conn is None:
+            return cypher
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cypher, created_at FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        cypher, created_at = row
+        remaining = self.ttl - (time.time() - created_at) if self.ttl else None
+        if remaining is not None and remaining <= 0:
+            with self._lock:
+                self._conn.execute("DELETE FROM translations WHERE key = ?", (key,))
+                self._conn.commit()
+            return None
+        self._memory.set(key, cypher, ttl=remaining)
+        return cypher
+
+    def put(self, user_query, schema, cypher):
+        key = translation_key(user_query, schema)
+        self._memory.set(key, cypher)
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO translations (key, cypher, created_at) VALUES (?, ?, ?)",
+                    (key, cypher, time.time()),
+                )
+                self._conn.commit()
+
+    def clear(self):
+        self._memory.clear()
+        if self._conn is not None:
+            with self._lock:
+                self._conn.execute("DELETE FROM translations")
+                self._conn.commit()
+
+    def stats(self):
+        return self._memory.stats()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cypher_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CypherTranslationCache()
+        return _default_cache
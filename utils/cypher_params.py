@@ -0,0 +1,85 @@
+"""Lift literals out of generated Cypher into query parameters.
+
+Neo4j caches execution plans by query text. LLM-generated queries inline
+their keywords ("python", 2, ...), so every search is a new text and gets
+re-planned. Replacing the literals with $parameters makes queries of the same
+shape share one cached plan.
+"""
+import re
+
+_ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "t": "\t", "r": "\r"}
+# Number right after a comparison operator or LIMIT / SKIP
+_NUMBER = re.compile(r"(?P<prefix>(?:<>|<=|>=|=|<|>|\bLIMIT|\bSKIP)\s*)(?P<num>-?\d+(?:\.\d+)?)\b(?![.\w])",
+                     re.IGNORECASE)
+PARAM_PREFIX = "lit_"
+
+
+def _read_string(cypher, start):
+    """Return (value, end index) for the string literal starting at ``start``."""
+    quote = cypher[start]
+    chars = []
+    i = start + 1
+    while i < len(cypher):
+        ch = cypher[i]
+        if ch == "\\" and i + 1 < len(cypher):
+            chars.append(_ESCAPES.get(cypher[i + 1], cypher[i + 1]))
+            i += 2
+            continue
+        if ch == quote:
+            return "".join(chars), i + 1
+        chars.append(ch)
+        i += 1
+    raise ValueError("Unterminated string literal in Cypher")
+
+
+def parameterize_cypher(cypher, params=None):
+    """Return (cypher, params) with string and comparison literals as $lit_N.
+
+    Identical literal values share one parameter. Comments and backtick
+    identifiers are left alone. Existing ``params`` are kept.
+    """
+    params = dict(params or {})
+    by_value = {}
+
+    def name_for(value):
+        key = (type(value), value)
+        if key not in by_value:
+            name = f"{PARAM_PREFIX}{len(by_value)}"
+            while name in params:
+                name += "_"
+            by_value[key] = name
+            params[name] = value
+        return "$" + by_value[key]
+
+    out = []
+    segment_start = 0
+    i = 0
+
+    def flush_code(end):
+        # Numbers are only lifted from code segments, never from inside strings
+        code = cypher[segment_start:end]
+        out.append(_NUMBER.sub(
+            lambda m: m.group("prefix") + name_for(float(m.group("num")) if "." in m.group("num")
+                                                    else int(m.group("num"))),
+            code,
+        ))
+
+    while i < len(cypher):
+        ch = cypher[i]
+        if ch in "'\"":
+            flush_code(i)
+            value, i = _read_string(cypher, i)
+            out.append(name_for(value))
+            segment_start = i
+            continue
+        if ch == "`":
+            end = cypher.find("`", i + 1)
+            i = len(cypher) if end == -1 else end + 1
+            continue
+        if cypher.startswith("//", i):
+            end = cypher.find("\n", i)
+            i = len(cypher) if end == -1 else end
+            continue
+        i += 1
+    flush_code(len(cypher))
+    return "".join(out), params
@@ -1,30 +1,33 @@
-import PyPDF2
-from langchain_google_genai import ChatGoogleGenerativeAI
 import json
-import os
 
 
 from dotenv import load_dotenv
-from pydantic import SecretStr
+
+from utils.extraction_cache import get_extraction_cache
+from utils.pdf_text import extract_text
+from utils import llm_gateway
 
 load_dotenv()
 
 
-def extract_text_from_pdf(file):
-    reader = PyPDF2.PdfReader(file)
-    return "\n".join(page.extract_text() for page in reader.pages)
+def extract_text_from_pdf(file, backend=None, max_pages=None, max_bytes=None):
+    # Backend, page cap and byte cap default to PDF_BACKEND / PDF_MAX_PAGES / PDF_MAX_BYTES
+    return extract_text(file, backend=backend, max_pages=max_pages, max_bytes=max_bytes)
+
 
+def extract_candidate_data(raw_text: str, prompt_template: str, use_cache: bool = True, llm=None):
+    cache = get_extraction_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(raw_text, prompt_template)
+        if cached is not None:
+            return cached
 
-def extract_candidate_data(raw_text: str, prompt_template: str):
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        api_key=SecretStr(os.getenv("GOOGLE_API_KEY", ""))
-    )
+    llm = llm or llm_gateway.get_llm("gemini-2.5-flash", temperature=None)
 
     # Format the prompt with the CV's raw text
     prompt = prompt_template.format(text=raw_text)
 
-    response = llm.invoke(prompt).content
+    response = llm_gateway.invoke(prompt, "extract_candidate_data", llm).content
     if isinstance(response, list):
         response = response[0]
     if isinstance(response, str):
@@ -42,5 +45,7 @@ def extract_candidate_data(raw_text: str, prompt_template: str):
     except json.JSONDecodeError:
         raise ValueError("❌ LLM response could not be parsed as valid JSON:\n" + response)
 
+    if cache is not None:
+        cache.put(raw_text, prompt_template, candidate_data)
     return candidate_data
 
@@ -13,3 +13,18 @@ def get_knowledge_graph_schema():
             }
         }
     }
+
+
+# Schema as given to the LLM when generating Cypher
+GRAPH_SCHEMA_TEXT = """
+(:Candidate {name, email, name_search, email_search})
+(:Skill {name, name_search, aliases})
+(:Education {university, degree, university_search, degree_search})
+(:Work {company, position, years, company_search, position_search})
+(:Project {name, name_search, aliases})
+
+(:Candidate)-[:HAS_SKILL]->(:Skill)
+(:Candidate)-[:STUDIED_IN]->(:Education)
+(:Candidate)-[:WORKED_IN]->(:Work)
+(:Candidate)-[:HAS_PROJECT_ON]->(:Project)
+"""
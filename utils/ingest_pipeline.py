@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.extract_cv_data import extract_candidate_data
+from utils.pdf_text import extract_pages
+from utils.cv_preprocess import preprocess_cv, merge_extractions
+from utils import telemetry
+from utils.neo4j_ops import STORE_FAILED, save_candidates_to_neo4j
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = telemetry.get_logger(__name__)
+
+# Worker counts per stage. Parsing is CPU bound, extraction and storing mostly
+# wait on Gemini / Neo4j, so the extract stage gets the most workers.
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "2"))
+EXTRACT_WORKERS = int(os.getenv("INGEST_EXTRACT_WORKERS", "8"))
+STORE_WORKERS = int(os.getenv("INGEST_STORE_WORKERS", "2"))
+# Extracted candidates are written to Neo4j in batches of this size.
+STORE_BATCH_SIZE = int(os.getenv("INGEST_STORE_BATCH_SIZE", "25"))
+
+def _file_name(file):
+    return getattr(file, "name", None) or str(file)
+
+
+def parse_stage(file):
+    # Cleaned text split into chunks that fit the token budget
+    with telemetry.span("ingest.parse"):
+        return preprocess_cv(extract_pages(file))
+
+
+def extract_stage(prepared, prompt_template, llm=None, use_cache=True):
+    with telemetry.span("ingest.extract", chunks=len(prepared["chunks"])):
+        results = [extract_candidate_data(chunk, prompt_template, use_cache=use_cache, llm=llm)
+                   for chunk in prepared["chunks"]]
+        return results[0] if len(results) == 1 else merge_extractions(results)
+
+
+def store_stage(candidates, driver=None):
+    with telemetry.span("ingest.store", batch=len(candidates)):
+        return save_candidates_to_neo4j(candidates, driver=driver)
+
+
+def ingest_files(files, prompt_template, parse_workers=None, extract_workers=None,
+                 store_workers=None, store_batch_size=None, on_progress=None,
+                 llm=None, driver=None, use_cache=True):
+    """Run uploaded CVs through the parse -> extract -> store stages concurrently.
+
+    Each stage has its own bounded pool. Extracted candidates are buffered and
+    stored in batches of ``store_batch_size`` (one Neo4j transaction each).
+    A failure in any stage only marks that file as failed (a store batch
+    whose rows cannot be retried one by one fails as a whole); the rest of
+    the upload keeps going. ``on_progress(outcome,
+    completed, total)`` is called from the calling thread whenever a file
+    finishes, so it is safe to update Streamlit widgets from it. ``llm`` and
+    ``driver`` replace the shared Gemini client and Neo4j driver (benchmarks
+    pass stand-ins here); ``use_cache=False`` bypasses the extraction cache.
+
+    Returns one outcome dict per file, in the order the files were given.
+    ``tokens_before`` / ``tokens_after`` record the CV text size before and
+    after preprocessing, and ``chunks`` how many extraction calls it took.
+    """
+    files = list(files)
+    outcomes = [
+        {"file": _file_name(f), "status": "pending", "stage": None,
+         "data": None, "result": None, "error": None,
+         "tokens_before": None, "tokens_after": None, "chunks": None}
+        for f in files
+    ]
+    if not files:
+        return outcomes
+
+    pools = {
+        "parse": ThreadPoolExecutor(parse_workers or PARSE_WORKERS, thread_name_prefix="ingest-parse"),
+        "extract": ThreadPoolExecutor(extract_workers or EXTRACT_WORKERS, thread_name_prefix="ingest-extract"),
+        "store": ThreadPoolExecutor(store_workers or STORE_WORKERS, thread_name_prefix="ingest-store"),
+    }
+    stage_funcs = {
+        "parse": parse_stage,
+        "extract": lambda prepared: extract_stage(prepared, prompt_template, llm, use_cache),
+    }
+
+    store_batch_size = store_batch_size or STORE_BATCH_SIZE
+    # future -> (file index or list of indexes for a store batch, stage)
+    in_flight = {}
+    store_buffer = []
+
+    def submit(idx, stage, arg):
+        outcomes[idx]["stage"] = stage
+        in_flight[pools[stage].submit(stage_funcs[stage], arg)] = (idx, stage)
+
+    def flush_store_buffer():
+        batch = list(store_buffer)
+        store_buffer.clear()
+        for idx in batch:
+            outcomes[idx]["stage"] = "store"
+        future = pools["store"].submit(store_stage, [outcomes[idx]["data"] for idx in batch], driver)
+        in_flight[future] = (batch, "store")
+
+    completed = 0
+
+    def finish(idx):
+        nonlocal completed
+        completed += 1
+        if on_progress:
+            on_progress(outcomes[idx], completed, len(files))
+
+    def fail(idx, stage, error):
+        outcome = outcomes[idx]
+        outcome["status"] = "failed"
+        outcome["error"] = error
+        logger.warning("ingest failed", extra={"file": outcome["file"], "stage": stage, "error": error})
+        finish(idx)
+
+    try:
+        for idx, f in enumerate(files):
+            submit(idx, "parse", f)
+
+        while in_flight or store_buffer:
+            upstream_busy = any(stage != "store" for _, stage in in_flight.values())
+            if store_buffer and (len(store_buffer) >= store_batch_size or not upstream_busy):
+                flush_store_buffer()
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx, stage = in_flight.pop(future)
+                try:
+                    value = future.result()
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    for i in (idx if stage == "store" else [idx]):
+                        fail(i, stage, error)
+                    continue
+
+                if stage == "parse":
+                    outcomes[idx]["tokens_before"] = value["tokens_before"]
+                    outcomes[idx]["tokens_after"] = value["tokens_after"]
+                    outcomes[idx]["chunks"] = len(value["chunks"])
+                    submit(idx, "extract", value)
+                elif stage == "extract":
+                    outcomes[idx]["data"] = value
+                    store_buffer.append(idx)
+                else:
+                    for i, status in zip(idx, value):
+                        if status["status"] in ("Invalid candidate data", STORE_FAILED):
+                            fail(i, stage, status["error"] or status["status"])
+                            continue
+                        outcomes[i]["result"] = status["status"]
+                        outcomes[i]["status"] = "ok"
+                        finish(i)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return outcomes
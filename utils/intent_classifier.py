@@ -0,0 +1,208 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Below this confidence the caller should ask the LLM instead.
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))
+LABELLED_QUERIES_PATH = os.path.join(os.path.dirname(__file__), "intent_queries.jsonl")
+# Held out: never trained on, and not used when writing the rules below
+EVAL_QUERIES_PATH = os.path.join(os.path.dirname(__file__), "intent_queries_eval.jsonl")
+# Returned for cases the rules cannot settle, so the caller asks the LLM
+_UNSURE_CONFIDENCE = 0.5
+
+_GREETING = re.compile(
+    r"^(hi|hello|hey|good (morning|afternoon|evening)|thanks|thank you|bye|goodbye|ok|okay|cool|great)\b"
+)
+_ABOUT_SYSTEM = re.compile(
+    r"\b(who are you|what are you|what can you do|your name|how are you|yourself|"
+    r"store (the )?data|this (app|system)|are you a bot)\b"
+)
+_CANDIDATE_TERMS = re.compile(
+    r"\b(candidates?|cvs?|resumes?|skills?|skilled|university|studied|degree|education|"
+    r"projects?|email|emails|developers?|engineers?|applicants?|python|java|react|sql|"
+    r"django|docker|internship)\b"
+)
+# Common in small talk too ("how does this work?", "what is your experience"),
+# so on their own they only count next to a search verb
+_GENERIC_TERMS = re.compile(
+    r"\b(experience|experienced|years?|worked|work|companies|company|position)\b"
+)
+_SEARCH_VERBS = re.compile(
+    r"\b(find|show|list|search|get|give|fetch|filter|who|which|any|anyone|someone)\b"
+)
+_FOLLOWUP_TERMS = re.compile(
+    r"\b(their|them|they|those|these|above|previous|same candidates|of them|of these|of those)\b"
+)
+# Unambiguous references back to the previous answer
+_STRONG_FOLLOWUP_TERMS = re.compile(
+    r"\b(those|these|above|previous|same candidates|of them|of these|of those)\b"
+)
+# A query that names who it is looking for ("all candidates with their
+# emails") is usually standalone even when it says "their".
+_OWN_CRITERIA = re.compile(
+    r"\b(all|candidates?|developers?|engineers?|applicants?|people|profiles?|with|who|"
+    r"python|java|react|sql|django|docker)\b"
+)
+
+
+def _tokens(text):
+    words = re.findall(r"[a-z0-9+#]+", text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayes:
+    """Tiny multinomial naive Bayes over unigrams and bigrams."""
+
+    def __init__(self, examples):
+        self.class_counts = Counter()
+        self.token_counts = {}
+        self.vocab = set()
+        for text, label in examples:
+            self.class_counts[label] += 1
+            counts = self.token_counts.setdefault(label, Counter())
+            for token in _tokens(text):
+                counts[token] += 1
+                self.vocab.add(token)
+        self.totals = {label: sum(c.values()) for label, c in self.token_counts.items()}
+
+    def predict(self, text):
+        tokens = [t for t in _tokens(text) if t in self.vocab]
+        n = sum(self.class_counts.values())
+        scores = {}
+        for label, prior in self.class_counts.items():
+            counts = self.token_counts[label]
+            denom = self.totals[label] + len(self.vocab)
+            log_likelihood = sum(math.log((counts[t] + 1) / denom) for t in tokens)
+            # Averaging per token keeps posteriors from saturating on long
+            # queries, so the confidence stays usable as a fallback signal.
+            scores[label] = math.log(prior / n) + log_likelihood / max(len(tokens), 1)
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp.values())
+        label = max(exp, key=exp.get)
+        return label, exp[label] / total
+
+
+def load_labelled_queries(path=LABELLED_QUERIES_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _train(rows):
+    type_model = NaiveBayes((r["query"], r["type"]) for r in rows)
+    followup_model = NaiveBayes(
+        (r["query"], r["followup"]) for r in rows if r["type"] == "candidate"
+    )
+    return type_model, followup_model
+
+
+_models = None
+_models_lock = threading.Lock()
+
+
+def _get_models():
+    global _models
+    with _models_lock:
+        if _models is None:
+            _models = _train(load_labelled_queries())
+        return _models
+
+
+def _has_candidate_terms(q):
+    return bool(_CANDIDATE_TERMS.search(q)
+                or (_GENERIC_TERMS.search(q) and _SEARCH_VERBS.search(q)))
+
+
+def classify_query_type(query, models=None):
+    """Return (label, confidence) with label "conversation" or "candidate"."""
+    q = " ".join(query.lower().split())
+    has_candidate_terms = _has_candidate_terms(q)
+    has_followup_terms = bool(_FOLLOWUP_TERMS.search(q))
+    if _GREETING.search(q) or _ABOUT_SYSTEM.search(q):
+        if not (has_candidate_terms or has_followup_terms or _GENERIC_TERMS.search(q)):
+            return "conversation", 0.95
+        # Mixed signals ("thanks for the candidates", "ok show those"): let
+        # the LLM decide
+        type_model, _ = models or _get_models()
+        label, confidence = type_model.predict(q)
+        return label, min(confidence, _UNSURE_CONFIDENCE)
+    if has_candidate_terms:
+        return "candidate", 0.9
+    if has_followup_terms:
+        # "tell me more about them" only makes sense about earlier results
+        return "candidate", 0.85
+    type_model, _ = models or _get_models()
+    label, confidence = type_model.predict(q)
+    if _GENERIC_TERMS.search(q):
+        # "work" or "experience" without a search verb settles nothing
+        return label, min(confidence, _UNSURE_CONFIDENCE)
+    return label, confidence
+
+
+def classify_followup(query, models=None):
+    """Return (is_followup, confidence) for a candidate query."""
+    q = " ".join(query.lower().split())
+    if _STRONG_FOLLOWUP_TERMS.search(q):
+        return True, 0.9
+    if _FOLLOWUP_TERMS.search(q):
+        if not _OWN_CRITERIA.search(q):
+            return True, 0.9
+        # "find python developers and their projects": a pronoun alone does
+        # not decide it
+        _, followup_model = models or _get_models()
+        label, confidence = followup_model.predict(q)
+        return label, min(confidence, _UNSURE_CONFIDENCE)
+    if _has_candidate_terms(q):
+        # Explicit search criteria and no reference back to earlier results
+        return False, 0.85
+    _, followup_model = models or _get_models()
+    return followup_model.predict(q)
+
+
+def evaluate(rows=None, eval_rows=None, threshold=INTENT_CONFIDENCE_THRESHOLD):
+    """Accuracy and LLM fallback rate on the held-out eval split.
+
+    The models are trained on ``rows`` (the labelled set) only; the hand
+    rules were written against that set too, so ``eval_rows`` is the only
+    fair measure of both.
+    """
+    rows = rows if rows is not None else load_labelled_queries()
+    eval_rows = eval_rows if eval_rows is not None else load_labelled_queries(EVAL_QUERIES_PATH)
+    models = _train(rows)
+    report = {}
+    tasks = {
+        "query_type": (eval_rows, classify_query_type, "type"),
+        "followup": ([r for r in eval_rows if r["type"] == "candidate"], classify_followup, "followup"),
+    }
+    for task, (subset, classify, field) in tasks.items():
+        correct = confident = confident_correct = 0
+        for row in subset:
+            label, confidence = classify(row["query"], models)
+            hit = label == row[field]
+            correct += hit
+            if confidence >= threshold:
+                confident += 1
+                confident_correct += hit
+        report[task] = {
+            "examples": len(subset),
+            "accuracy": correct / len(subset) if subset else 0.0,
+            "fast_path_accuracy": confident_correct / confident if confident else 0.0,
+            "fallback_rate": 1 - confident / len(subset) if subset else 0.0,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    for task, metrics in evaluate().items():
+        print(
+            f"{task}: n={metrics['examples']} accuracy={metrics['accuracy']:.2%} "
+            f"fast-path accuracy={metrics['fast_path_accuracy']:.2%} "
+            f"fallback rate={metrics['fallback_rate']:.2%}"
+        )
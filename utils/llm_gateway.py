@@ -0,0 +1,398 @@
+"""Single entry point for every Gemini call.
+
+- Clients are built once per (model, temperature) and reused.
+- Prompt template files are read once at import.
+- Identical prompts already in flight on the same client share one request.
+- 429 / quota errors are retried with exponential backoff and jitter, and
+  shrink an adaptive concurrency limit that grows back on success (AIMD).
+- Calls, retries, latency and token usage are counted per call site.
+
+``ainvoke`` is the asyncio counterpart of ``invoke`` and shares the same
+limiter and counters. ``GatewayLLM`` wraps a client for LangChain components
+that call the model themselves (conversation chains, summary memory), so
+their calls go through the gateway too.
+"""
+import asyncio
+import collections
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+from langchain_core.language_models.llms import LLM
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import SecretStr
+
+from utils import telemetry
+from utils.cv_preprocess import count_tokens
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    _RATE_LIMIT_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+except ImportError:  # pragma: no cover - installed with langchain-google-genai
+    _RATE_LIMIT_ERRORS = ()
+
+load_dotenv()
+
+logger = telemetry.get_logger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "30.0"))
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_FILES = {
+    "cvparser": os.path.join(_ROOT, "cvparser_prompt_template.txt"),
+    "extraction": os.path.join(_ROOT, "utils", "extraction_prompt.txt"),
+}
+
+
+def _read_prompts():
+    prompts = {}
+    for name, path in PROMPT_FILES.items():
+        with open(path) as f:
+            prompts[name] = f.read()
+    return prompts
+
+
+_prompts = _read_prompts()
+
+
+def load_prompt(name):
+    return _prompts[name]
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm(model=DEFAULT_MODEL, temperature=0.1):
+    """Shared ChatGoogleGenerativeAI client; temperature=None keeps the model default."""
+    key = (model, temperature)
+    with _clients_lock:
+        if key not in _clients:
+            kwargs = {"model": model, "api_key": SecretStr(os.getenv("GOOGLE_API_KEY", ""))}
+            if temperature is not None:
+                kwargs["temperature"] = temperature
+            _clients[key] = ChatGoogleGenerativeAI(**kwargs)
+        return _clients[key]
+
+
+def _status_code(error):
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 / ResourceExhausted, also when wrapped by another exception."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, _RATE_LIMIT_ERRORS) or _status_code(error) == 429:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop=None, future=None):
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves on rate limiting and creeps back up.
+
+    Threads and coroutines wait in one FIFO queue and a freed slot is handed
+    straight to the oldest waiter, so neither kind can starve the other.
+    """
+
+    def __init__(self, max_limit=LLM_MAX_CONCURRENCY, min_limit=1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._waiters = collections.deque()
+
+    def _grant(self):
+        # Called with self._cond held
+        woke_thread = False
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+            self.in_flight += 1
+            if waiter.future is not None:
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+            else:
+                woke_thread = True
+        if woke_thread:
+            self._cond.notify_all()
+
+    def acquire(self):
+        with self._cond:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+            while not waiter.granted:
+                self._cond.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = _Waiter(loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._cond:
+                if waiter.granted:
+                    # The slot arrived as we were cancelled; pass it on
+                    self.in_flight -= 1
+                    self._grant()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._grant()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1 / max(self.limit, 1))
+            self._grant()
+
+    def on_rate_limited(self):
+        with self._cond:
+            self.limit = max(self.min_limit, self.limit / 2)
+
+
+_limiter = AdaptiveLimiter()
+_stats = {}
+_stats_lock = threading.Lock()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def _record(call_site, **deltas):
+    with _stats_lock:
+        entry = _stats.setdefault(call_site, {
+            "calls": 0, "errors": 0, "retries": 0, "coalesced": 0,
+            "latency_total_s": 0.0, "latency_max_s": 0.0,
+            "input_tokens": 0, "output_tokens": 0,
+        })
+        for name, value in deltas.items():
+            if name == "latency_s":
+                entry["latency_total_s"] += value
+                entry["latency_max_s"] = max(entry["latency_max_s"], value)
+            else:
+                entry[name] += value
+
+
+def _record_usage(call_site, message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    _record(call_site, input_tokens=usage.get("input_tokens", 0) or 0,
+            output_tokens=usage.get("output_tokens", 0) or 0)
+
+
+def _with_retries(call_site, fn):
+    attempt = 0
+    while True:
+        _limiter.acquire()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= LLM_MAX_RETRIES:
+                raise
+            _limiter.on_rate_limited()
+            delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning("rate limited; retrying", extra={
+                "call_site": call_site, "retry_in_s": round(delay, 2), "error": str(e)})
+            attempt += 1
+            _record(call_site, retries=1)
+        else:
+            _limiter.on_success()
+            return result
+        finally:
+            _limiter.release()
+        time.sleep(delay)
+
+
+def invoke(prompt, call_site, llm=None):
+    """llm.invoke(prompt) through the gateway; returns the response message."""
+    llm = llm or get_llm()
+    key = (id(llm), prompt)
+    with _in_flight_lock:
+        pending = _in_flight.get(key)
+        if pending is None:
+            pending = _in_flight[key] = Future()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        _record(call_site, coalesced=1)
+        return pending.result()
+
+    start = time.perf_counter()
+    try:
+        message = _with_retries(call_site, lambda: llm.invoke(prompt))
+    except Exception as e:
+        _record(call_site, calls=1, errors=1, latency_s=time.perf_counter() - start)
+        pending.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+    _record(call_site, calls=1, latency_s=time.perf_counter() - start)
+    _record_usage(call_site, message)
+    pending.set_result(message)
+    return message
+
+
+_ain_flight = {}
+
+
+async def _awith_retries(call_site, fn):
+    attempt = 0
+    while True:
+        await _limiter.aacquire()
+        try:
+            result = await fn()
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt >= LLM_MAX_RETRIES:
+                raise
+            _limiter.on_rate_limited()
+            delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning("rate limited; retrying", extra={
+                "call_site": call_site, "retry_in_s": round(delay, 2), "error": str(e)})
+            attempt += 1
+            _record(call_site, retries=1)
+        else:
+            _limiter.on_success()
+            return result
+        finally:
+            _limiter.release()
+        await asyncio.sleep(delay)
+
+
+async def _ainvoke_once(prompt, call_site, llm):
+    start = time.perf_counter()
+    try:
+        message = await _awith_retries(call_site, lambda: llm.ainvoke(prompt))
+    except Exception:
+        _record(call_site, calls=1, errors=1, latency_s=time.perf_counter() - start)
+        raise
+    _record(call_site, calls=1, latency_s=time.perf_counter() - start)
+    _record_usage(call_site, message)
+    return message
+
+
+async def ainvoke(prompt, call_site, llm=None):
+    """await llm.ainvoke(prompt) through the gateway; identical prompts in
+    flight on the same event loop share one request."""
+    llm = llm or get_llm()
+    key = (id(asyncio.get_running_loop()), id(llm), prompt)
+    task = _ain_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_ainvoke_once(prompt, call_site, llm))
+        _ain_flight[key] = task
+        task.add_done_callback(lambda _: _ain_flight.pop(key, None))
+    else:
+        _record(call_site, coalesced=1)
+    # shield: one caller being cancelled must not cancel the shared request
+    return await asyncio.shield(task)
+
+
+def stream(prompt, call_site, llm=None):
+    """Yield response chunks. Rate limits are only retried before the first chunk."""
+    llm = llm or get_llm()
+    start = time.perf_counter()
+    attempt = 0
+    while True:
+        _limiter.acquire()
+        started = False
+        try:
+            last = None
+            for chunk in llm.stream(prompt):
+                started = True
+                last = chunk if last is None else last + chunk
+                yield chunk
+            _limiter.on_success()
+            _record(call_site, calls=1, latency_s=time.perf_counter() - start)
+            if last is not None:
+                _record_usage(call_site, last)
+            return
+        except Exception as e:
+            if started or not is_rate_limit_error(e) or attempt >= LLM_MAX_RETRIES:
+                _record(call_site, calls=1, errors=1, latency_s=time.perf_counter() - start)
+                raise
+            _limiter.on_rate_limited()
+            _record(call_site, retries=1)
+            delay = min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+            attempt += 1
+        finally:
+            _limiter.release()
+        time.sleep(delay)
+
+
+class GatewayLLM(LLM):
+    """LangChain LLM that sends every call through ``invoke`` / ``ainvoke``.
+
+    The client is resolved on first use (``get_llm(model, temperature)``
+    unless ``client`` is given), so building one needs no API key. Token
+    counts for memory pruning are estimated locally instead of by an API call.
+    """
+
+    call_site: str
+    model: str = DEFAULT_MODEL
+    temperature: Optional[float] = 0.1
+    client: Any = None
+
+    @property
+    def _llm_type(self):
+        return "gemini-gateway"
+
+    @property
+    def chat_model(self):
+        return self.client if self.client is not None else get_llm(self.model, self.temperature)
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        return invoke(prompt, self.call_site, self.chat_model).content
+
+    async def _acall(self, prompt, stop=None, run_manager=None, **kwargs):
+        return (await ainvoke(prompt, self.call_site, self.chat_model)).content
+
+    def get_num_tokens(self, text):
+        return count_tokens(text)
+
+
+def stats():
+    with _stats_lock:
+        snapshot = {site: dict(entry) for site, entry in _stats.items()}
+    for entry in snapshot.values():
+        entry["latency_avg_s"] = entry["latency_total_s"] / entry["calls"] if entry["calls"] else 0.0
+    return {"concurrency_limit": int(_limiter.limit), "in_flight": _limiter.in_flight, "call_sites": snapshot}
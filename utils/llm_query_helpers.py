@@ -1,7 +1,36 @@
-import streamlit as st
+import json
+import os
+import re
 
-def detect_query_type(query, llm):
-    prompt = f"""
+
+from utils.search_text import rewrite_contains_filters
+from utils.canonicalize import rewrite_skill_filters
+from utils.cypher_cache import get_cypher_cache
+from utils.intent_classifier import classify_query_type, INTENT_CONFIDENCE_THRESHOLD
+from utils.result_rendering import render_results
+from utils.cypher_params import parameterize_cypher
+from utils.result_cache import get_result_cache
+from utils import llm_gateway
+from utils import telemetry
+
+logger = telemetry.get_logger(__name__)
+
+# Records pulled from Neo4j per network round trip, rows per page handed to
+# consumers, and the hard cap on rows materialized for any single query.
+CYPHER_FETCH_SIZE = int(os.getenv("CYPHER_FETCH_SIZE", "100"))
+CYPHER_PAGE_SIZE = int(os.getenv("CYPHER_PAGE_SIZE", "50"))
+CYPHER_MAX_ROWS = int(os.getenv("CYPHER_MAX_ROWS", "500"))
+# Past the materialized rows, records are only counted, and only up to this
+# many in total; a huge match is reported as "more than" instead of streamed.
+CYPHER_COUNT_LIMIT = int(os.getenv("CYPHER_COUNT_LIMIT", "2000"))
+
+def _local_query_type(query):
+    label, confidence = classify_query_type(query)
+    return label if confidence >= INTENT_CONFIDENCE_THRESHOLD else None
+
+
+def build_query_type_prompt(query):
+    return f"""
 Your task is to classify the user's input into one of the following categories:
 
 - conversation → for greetings, small talk, or general questions about you, the system, or data storage (e.g., "hello", "how are you", "who are you", "where do you store data?")
@@ -12,16 +41,34 @@ Return only one word: **conversation** or **candidate**.
 
 Do not explain. Do not include punctuation or extra words. Return just the category name.
 """
-    response = llm.invoke(prompt).content.strip().lower()
 
+
+def parse_query_type_response(response):
+    response = response.strip().lower()
     # Remove possible formatting from LLM output
     if response.startswith("```"):
         response = response.strip("```").strip()
-
     return response
 
-def candidate_query_to_cypher(user_query, schema, llm):
-    prompt = f"""
+
+def detect_query_type(query, llm, use_local=True):
+    # Cheap local decision first; only ambiguous inputs go to Gemini
+    label = _local_query_type(query) if use_local else None
+    if label is not None:
+        return label
+    prompt = build_query_type_prompt(query)
+    return parse_query_type_response(llm_gateway.invoke(prompt, "detect_query_type", llm).content)
+
+
+async def adetect_query_type(query, llm, use_local=True):
+    label = _local_query_type(query) if use_local else None
+    if label is not None:
+        return label
+    prompt = build_query_type_prompt(query)
+    return parse_query_type_response((await llm_gateway.ainvoke(prompt, "detect_query_type", llm)).content)
+
+def _cypher_instructions(schema):
+    return f"""
 You are an expert in Cypher and Neo4j. You are given a knowledge graph schema and must only use nodes, relationships, and properties that exist in the schema as follows Dont use any other node on your own:
 {schema}
 
@@ -30,8 +77,9 @@ Your task is to generate a Cypher query to answer the user's question. Follow AL
 
 Instructions:
 1. Use **case-insensitive** and **partial** matching on string properties:
-   - Use `toLower(property) CONTAINS toLower("keyword")`
-   - Applies to all string filters.
+   - Filter on the indexed, already-lowercased `<property>_search` twin: `s.name_search CONTAINS "keyword"`
+   - Always write the keyword in lowercase. Never wrap properties in `toLower()`.
+   - Applies to all string filters. Return the original property (e.g. `s.name`), not the `_search` twin.
 
 2. Output **only the Cypher query**:
    - No explanations, comments, or markdown
@@ -77,7 +125,7 @@ Instructions:
 some examples:
 if asked about "any 5 candidate who 2 years of experience in python"
 MATCH (c:Candidate)-[:WORKED_IN]->(w:Work)
-WHERE w.years = 2 AND toLower(w.position) CONTAINS toLower("python")
+WHERE w.years = 2 AND w.position_search CONTAINS "python"
 RETURN DISTINCT c.name LIMIT 5
 
 if asked about "any candidates who have same skills" , follow same logic for other too.
@@ -91,7 +139,7 @@ if asked about cv of candidate who has work for 2 or more years in java
 MATCH (c:Candidate)
 WHERE (EXISTS {{
     MATCH (c)-[:WORKED_IN]->(w:Work)
-    WHERE w.years >= 2 AND toLower(w.position) CONTAINS toLower("jav")
+    WHERE w.years >= 2 AND w.position_search CONTAINS "jav"
 }}) 
 OPTIONAL MATCH (c)-[:HAS_SKILL]->(s:Skill)
 OPTIONAL MATCH (c)-[:STUDIED_IN]->(edu:Education)
@@ -104,34 +152,290 @@ RETURN
     COLLECT(DISTINCT {{university: edu.university, degree: edu.degree}}) AS education,
     COLLECT(DISTINCT {{company: work.company, position: work.position, years: work.years}}) AS workExperience,
     COLLECT(DISTINCT proj.name) AS projects
+"""
 
+
+def build_cypher_prompt(user_query, schema):
+    return _cypher_instructions(schema) + f"""
 🧠User Query:
 {user_query}
 """
-    cypher_code = llm.invoke(prompt).content.strip()
+
+
+def clean_cypher_response(cypher_code):
+    cypher_code = cypher_code.strip()
     if cypher_code.startswith("```"):
         cypher_code = cypher_code.strip("`")
         if cypher_code.lower().startswith("cypher"):
             cypher_code = cypher_code[6:].strip()
+    # Catch any toLower(...) filters the model still emits, then match known
+    # (canonical) skills exactly
+    return rewrite_skill_filters(rewrite_contains_filters(cypher_code))
+
+
+def candidate_query_to_cypher(user_query, schema, llm, use_cache=True):
+    cache = get_cypher_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(user_query, schema)
+        if cached is not None:
+            return cached
+
+    prompt = build_cypher_prompt(user_query, schema)
+    cypher_code = clean_cypher_response(llm_gateway.invoke(prompt, "candidate_query_to_cypher", llm).content)
+    if cache is not None and cypher_code:
+        cache.put(user_query, schema, cypher_code)
     return cypher_code
 
-def run_cypher(cypher_query, driver):
-    # Debug: Print the Cypher query being executed
-    # print("[DEBUG] Executing Cypher Query:\n", cypher_query)
+
+async def acandidate_query_to_cypher(user_query, schema, llm, use_cache=True):
+    cache = get_cypher_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(user_query, schema)
+        if cached is not None:
+            return cached
+
+    prompt = build_cypher_prompt(user_query, schema)
+    response = await llm_gateway.ainvoke(prompt, "candidate_query_to_cypher", llm)
+    cypher_code = clean_cypher_response(response.content)
+    if cache is not None and cypher_code:
+        cache.put(user_query, schema, cypher_code)
+    return cypher_code
+
+
+_CYPHER_START = re.compile(r"^\s*(MATCH|OPTIONAL\s+MATCH|WITH|UNWIND|CALL)\b", re.IGNORECASE)
+
+
+def build_combined_prompt(user_query, schema):
+    return _cypher_instructions(schema) + f"""
+---
+This time, do three things in ONE answer for the user query below:
+1. category: "candidate" if answering needs a search of the candidate database, otherwise "conversation"
+   (greetings, small talk, questions about you or the system).
+2. followup: true if the query refers back to earlier results (e.g. "their", "those", "them", "the above"), else false.
+3. cypher: if category is "candidate", a Cypher query following ALL the instructions above, otherwise "".
+
+Return ONLY a JSON object, no markdown:
+{{"category": "candidate" | "conversation", "followup": true | false, "cypher": "..."}}
+
+🧠User Query:
+{user_query}
+"""
+
+
+def parse_combined_response(text):
+    """Validate the combined-mode JSON; return None if anything is off."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text.lower().startswith("json"):
+            text = text[4:].strip()
     try:
-        with driver.session() as session:
-            result = session.run(cypher_query)
-            data = []
-            for record in result:
-                # Dynamically build the candidate dict based on available keys
-                candidate = {}
-                for key in record.keys():
-                    candidate[key] = record.get(key)
-                data.append(candidate)
-            return data
+        data = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    category = str(data.get("category", "")).strip().lower()
+    followup = data.get("followup")
+    cypher = data.get("cypher") or ""
+    if category not in ("candidate", "conversation") or not isinstance(followup, bool):
+        return None
+    if not isinstance(cypher, str):
+        return None
+    cypher = clean_cypher_response(cypher) if cypher else ""
+    if category == "candidate" and not _CYPHER_START.match(cypher):
+        return None
+    return {"category": category, "followup": category == "candidate" and followup, "cypher": cypher}
+
+
+def route_query_combined(user_query, schema, llm, use_cache=True):
+    """Classify, detect follow-up and generate Cypher in a single LLM call.
+
+    Returns {"category", "followup", "cypher"}, or None when the response
+    cannot be validated, in which case callers use the three-call path.
+    """
+    try:
+        prompt = build_combined_prompt(user_query, schema)
+        routed = parse_combined_response(llm_gateway.invoke(prompt, "route_query_combined", llm).content)
     except Exception as e:
-        st.error(f" Error running Cypher query: {e}")
-        return []
+        logger.warning("combined routing call failed", extra={"error": str(e)})
+        return None
+    if routed is None:
+        logger.info("combined routing response invalid; using separate calls")
+        return None
+    if use_cache and routed["category"] == "candidate" and not routed["followup"]:
+        get_cypher_cache().put(user_query, schema, routed["cypher"])
+    return routed
+
+class CypherResultPages:
+    """Lazily fetched, row-capped result of a Cypher query.
+
+    Iterating yields pages (lists of dicts) of at most ``page_size`` rows while
+    the driver pulls records from the server ``fetch_size`` at a time. At most
+    ``max_rows`` rows are ever turned into dicts; past that the remaining
+    records are only counted, up to CYPHER_COUNT_LIMIT; ``total_matched``
+    and ``truncated`` are known once iteration finishes, and
+    ``total_capped`` says whether the count stopped at the limit.
+
+    A failed query yields nothing and leaves the exception in ``error``;
+    displaying it is up to the caller.
+
+    ``first_page()`` and ``rows()`` of read-only queries are served from the
+    result cache when the graph has not changed since they were stored.
+    """
+
+    def __init__(self, cypher_query, driver, params=None, fetch_size=None,
+                 max_rows=None, page_size=None, count_total=True, use_cache=True):
+        self.cypher_query = cypher_query
+        self.params = params or {}
+        self.driver = driver
+        self.fetch_size = fetch_size or CYPHER_FETCH_SIZE
+        self.max_rows = max_rows or CYPHER_MAX_ROWS
+        self.page_size = page_size or CYPHER_PAGE_SIZE
+        self.count_total = count_total
+        self.use_cache = use_cache
+        self.error = None
+        self.rows_returned = 0
+        self.total_matched = None
+        self.total_capped = False
+        self._count_only = False
+
+    @property
+    def truncated(self):
+        return self.total_matched is not None and self.total_matched > self.rows_returned
+
+    def __iter__(self):
+        try:
+            with self.driver.session(fetch_size=self.fetch_size) as session:
+                result = session.run(self.cypher_query, self.params)
+                matched = 0
+                page = []
+                for record in result:
+                    matched += 1
+                    if self._count_only or self.rows_returned >= self.max_rows:
+                        if not self.count_total:
+                            break
+                        if matched >= CYPHER_COUNT_LIMIT:
+                            # Closing the session discards the rest server-side
+                            self.total_capped = True
+                            break
+                        continue
+                    # Dynamically build the candidate dict based on available keys
+                    page.append(dict(zip(record.keys(), record.values())))
+                    self.rows_returned += 1
+                    if len(page) >= self.page_size:
+                        yield page
+                        page = []
+                if page:
+                    yield page
+                if self.count_total:
+                    self.total_matched = matched
+        except Exception as e:
+            self.error = e
+            logger.warning("cypher query failed", extra={"error": str(e), "cypher": self.cypher_query})
+
+    def _cache_key(self, mode, size):
+        cache = get_result_cache() if self.use_cache else None
+        if cache is None:
+            return cache, None
+        return cache, cache.key(self.cypher_query, self.params, (mode, size, self.count_total), self.driver)
+
+    def first_page(self):
+        """Return only the first page; the rest of the stream is just counted
+        (up to CYPHER_COUNT_LIMIT records)."""
+        cache, key = self._cache_key("first_page", self.page_size)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            page, self.total_matched, self.total_capped = cached
+            self.rows_returned = len(page)
+            return page
+
+        pages = iter(self)
+        page = next(pages, [])
+        self._count_only = True
+        for _ in pages:
+            pass
+        if cache is not None and self.error is None:
+            cache.put(key, (page, self.total_matched, self.total_capped))
+        return page
+
+    def rows(self):
+        """All rows up to max_rows, as one list."""
+        cache, key = self._cache_key("rows", self.max_rows)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            rows, self.total_matched, self.total_capped = cached
+            self.rows_returned = len(rows)
+            return rows
+
+        rows = [row for page in self for row in page]
+        if cache is not None and self.error is None:
+            cache.put(key, (rows, self.total_matched, self.total_capped))
+        return rows
+
+
+def _lift_literals(cypher_query, params):
+    # Inline literals become parameters so same-shaped queries share a plan.
+    # Generated Cypher can be malformed (a stray quote); send it as written
+    # and let Neo4j report the error through the normal error path.
+    try:
+        return parameterize_cypher(cypher_query, params)
+    except ValueError as e:
+        logger.warning("could not parameterize cypher", extra={"error": str(e), "cypher": cypher_query})
+        return cypher_query, params
+
+
+def stream_cypher(cypher_query, driver, params=None, lift_literals=True, **kwargs):
+    if lift_literals:
+        cypher_query, params = _lift_literals(cypher_query, params)
+    return CypherResultPages(cypher_query, driver, params, **kwargs)
+
+
+def run_cypher(cypher_query, driver, params=None, lift_literals=True, max_rows=None):
+    return stream_cypher(cypher_query, driver, params, lift_literals,
+                         max_rows=max_rows, count_total=False).rows()
+
+
+async def arun_cypher(cypher_query, driver, params=None, lift_literals=True, max_rows=None):
+    """run_cypher for neo4j.AsyncDriver. Returns (rows, truncated).
+
+    One row past ``max_rows`` is read to tell whether the result was cut off;
+    the rest of the stream is left unread. Errors propagate to the caller.
+    """
+    max_rows = max_rows or CYPHER_MAX_ROWS
+    if lift_literals:
+        cypher_query, params = _lift_literals(cypher_query, params)
+    cache = get_result_cache()
+    key = await cache.akey(cypher_query, params, ("async_rows", max_rows), driver) if cache is not None else None
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    rows, truncated = [], False
+    async with driver.session(fetch_size=CYPHER_FETCH_SIZE) as session:
+        result = await session.run(cypher_query, params or {})
+        async for record in result:
+            if len(rows) >= max_rows:
+                truncated = True
+                break
+            rows.append(dict(zip(record.keys(), record.values())))
+    if cache is not None:
+        cache.put(key, (rows, truncated))
+    return rows, truncated
+
+def build_display_prompt(result):
+    result_str = json.dumps(result, indent=2, ensure_ascii=False)
+    return f"""
+You are a helpful assistant. Format the following database query result for a recruiter.
+Present each candidate clearly in conversational natural language, using bullet points or short paragraphs.
+If multiple candidates are present, number them. For each candidate, include any available fields such as
+email, skills, education, work experience, projects, or activities — only if present in the data.
+Use concise sentences and omit any null or empty values.
+
+Data:
+{result_str}
+"""
+
 
 def display_results_with_llm(result, llm):
     # Return a clear message if no results found
@@ -148,26 +452,48 @@ def display_results_with_llm(result, llm):
     Returns:
         str: Formatted response string
     """
-    if not result:
-        return "No results found matching your query."
-    
-    # Let the LLM do all formatting for non-empty results
+    # Shapes we generate ourselves render locally without an LLM call
+    rendered = render_results(result)
+    if rendered is not None:
+        return rendered
+
+    # Let the LLM do all formatting for other non-empty results
     try:
-        import json
-        result_str = json.dumps(result, indent=2, ensure_ascii=False)
-        prompt = f"""
-You are a helpful assistant. Format the following database query result for a recruiter.
-Present each candidate clearly in conversational natural language, using bullet points or short paragraphs.
-If multiple candidates are present, number them. For each candidate, include any available fields such as
-email, skills, education, work experience, projects, or activities — only if present in the data.
-Use concise sentences and omit any null or empty values.
+        return llm_gateway.invoke(build_display_prompt(result), "display_results", llm).content.strip()
+    except Exception:
+        logger.exception("formatting results failed")
+        return json.dumps(result, indent=2, ensure_ascii=False)
 
-Data:
-{result_str}
-"""
-        return llm.invoke(prompt).content.strip()
-    except Exception as e:
-        import traceback, json
-        print(f"Error formatting results: {e}\n{traceback.format_exc()}\n")
+
+async def adisplay_results_with_llm(result, llm):
+    if not result:
+        return "No matching candidates found in the database."
+    rendered = render_results(result)
+    if rendered is not None:
+        return rendered
+    try:
+        response = await llm_gateway.ainvoke(build_display_prompt(result), "display_results", llm)
+        return response.content.strip()
+    except Exception:
+        logger.exception("formatting results failed")
         return json.dumps(result, indent=2, ensure_ascii=False)
-    
+
+
+def stream_results_with_llm(result, llm):
+    """Yield the formatted answer piece by piece, for st.write_stream."""
+    if not result:
+        yield "No matching candidates found in the database."
+        return
+
+    rendered = render_results(result)
+    if rendered is not None:
+        yield rendered
+        return
+
+    try:
+        for chunk in llm_gateway.stream(build_display_prompt(result), "display_results", llm):
+            if chunk.content:
+                yield chunk.content
+    except Exception:
+        logger.exception("streaming results failed")
+        yield json.dumps(result, indent=2, ensure_ascii=False)
@@ -1,21 +1,27 @@
-from neo4j import GraphDatabase
 import os
 
 from dotenv import load_dotenv
 
+from utils.search_text import SEARCH_PROPERTIES, add_search_properties
+from utils import canonicalize
+from utils.connections import get_neo4j_driver
+from utils.result_cache import BUMP_GRAPH_VERSION_QUERY, bump_graph_version
+from utils import telemetry
+
 load_dotenv()
 
-NEO4J_URI = os.environ["NEO4J_URI"]
-NEO4J_USER = os.environ["NEO4J_USER"]
-NEO4J_PASSWORD = os.environ["NEO4J_PASSWORD"]
+logger = telemetry.get_logger(__name__)
+
+
+def _get_driver():
+    return get_neo4j_driver()
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
 def candidate_exists(tx, name, email):
     query = "MATCH (c:Candidate {name: $name, email: $email}) RETURN c"
     return tx.run(query, name=name, email=email).single() is not None
 
-def store_candidate(tx, data):
+def _clean_candidate(data):
     # Set defaults for missing keys (single values or lists)
     data.setdefault("age", None)
     data.setdefault("skills", [])
@@ -46,60 +52,167 @@ def store_candidate(tx, data):
         if a and isinstance(a, dict) and a.get("name")
     ]
 
-    # Cypher query with proper UNWIND instead of FOREACH for MERGE with properties
-    query = """
-    MERGE (c:Candidate {name: $name, email: $email})
-    SET c.age = $age
-
-    WITH c
-    UNWIND $skills AS skill
+    # Spelling variants ("python3", "Python ") collapse onto one canonical node;
+    # the raw spellings travel along as raw_name / raw_names.
+    data["skills"] = canonicalize.canonicalize_items(data["skills"], canonicalize.skills)
+    data["projects"] = canonicalize.canonicalize_items(data["projects"], canonicalize.projects)
+
+    # Pre-normalized copies of the string properties used in keyword search
+    add_search_properties(data, SEARCH_PROPERTIES["Candidate"])
+    for key, label in (("skills", "Skill"), ("education", "Education"),
+                       ("work_experience", "Work"), ("projects", "Project"),
+                       ("activities", "Activity")):
+        for item in data[key]:
+            add_search_properties(item, SEARCH_PROPERTIES[label])
+
+    return data
+
+
+def _has_identity(data):
+    # name and email are the MERGE key; a null in either fails the whole query
+    return isinstance(data, dict) and all(
+        data.get(key) is not None and str(data[key]).strip() for key in ("name", "email")
+    )
+
+
+def save_to_neo4j(data, driver=None):
+    if not _has_identity(data):
+        raise ValueError("Invalid candidate data passed to save_to_neo4j")
+    status = save_candidates_to_neo4j([data], batch_size=1, driver=driver)[0]
+    if status["status"] == STORE_FAILED:
+        raise RuntimeError(status["error"])
+    return status["status"]
+
+
+# One round trip per batch: the existence check and all the MERGEs for every
+# candidate in the batch run inside a single parameterized query.
+BATCH_STORE_QUERY = """
+UNWIND $batch AS data
+OPTIONAL MATCH (existing:Candidate {name: data.name, email: data.email})
+WITH data, count(existing) > 0 AS existed
+CALL {
+    WITH data, existed
+    WITH data WHERE NOT existed
+    MERGE (c:Candidate {name: data.name, email: data.email})
+    SET c.age = data.age, c.name_search = data.name_search, c.email_search = data.email_search
+
+    WITH c, data
+    CALL {
+        WITH c, data
+        UNWIND data.skills AS skill
         MERGE (s:Skill {name: skill.name})
-        MERGE (c)-[:HAS_SKILL]->(s)
-
-    WITH c
-    UNWIND $education AS edu
+        SET s.name_search = skill.name_search,
+            s.aliases = [x IN coalesce(s.aliases, []) WHERE NOT x IN skill.raw_names] + skill.raw_names
+        MERGE (c)-[r:HAS_SKILL]->(s)
+        SET r.raw_name = skill.raw_name
+    }
+    CALL {
+        WITH c, data
+        UNWIND data.education AS edu
         MERGE (e:Education {degree: edu.degree, university: edu.university})
+        SET e.degree_search = edu.degree_search, e.university_search = edu.university_search
         MERGE (c)-[:STUDIED_IN]->(e)
-
-    WITH c
-    UNWIND $work_experience AS exp
+    }
+    CALL {
+        WITH c, data
+        UNWIND data.work_experience AS exp
         MERGE (w:Work {company: exp.company, position: exp.position, years: exp.years})
+        SET w.company_search = exp.company_search, w.position_search = exp.position_search
         MERGE (c)-[:WORKED_IN]->(w)
-
-    WITH c
-    UNWIND $projects AS proj
+    }
+    CALL {
+        WITH c, data
+        UNWIND data.projects AS proj
         MERGE (p:Project {name: proj.name})
-        MERGE (c)-[:HAS_PROJECT_ON]->(p)
-
-    WITH c
-    UNWIND $activities AS act
+        SET p.name_search = proj.name_search,
+            p.aliases = [x IN coalesce(p.aliases, []) WHERE NOT x IN proj.raw_names] + proj.raw_names
+        MERGE (c)-[r:HAS_PROJECT_ON]->(p)
+        SET r.raw_name = proj.raw_name
+    }
+    CALL {
+        WITH c, data
+        UNWIND data.activities AS act
         MERGE (a:Activity {name: act.name})
+        SET a.name_search = act.name_search
         MERGE (c)-[:HAS_ACTIVITY]->(a)
-    """
+    }
+}
+RETURN data.idx AS idx, existed
+"""
 
-    tx.run(query,
-           name=data.get("name"),
-           email=data.get("email"),
-           age=data.get("age"),
-           skills=data["skills"],
-           education=data["education"],
-           work_experience=data["work_experience"],
-           projects=data["projects"],
-           activities=data["activities"])
+NEO4J_WRITE_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", "200"))
 
+STORE_FAILED = "Store failed"
 
 
-def save_to_neo4j(data):
-    with driver.session() as session:
+def store_candidates_batch(tx, batch):
+    existed = {record["idx"]: record["existed"] for record in tx.run(BATCH_STORE_QUERY, batch=batch)}
+    if not all(existed.values()):
+        # Same transaction as the write: other processes' result caches see both at once
+        tx.run(BUMP_GRAPH_VERSION_QUERY).consume()
+    return existed
+
+
+def _write_batch(session, batch, statuses):
+    existed = session.write_transaction(store_candidates_batch, batch)
+    if not all(existed.get(row["idx"]) for row in batch):
+        # New candidates change query answers; drop cached results
+        bump_graph_version()
+    for row in batch:
+        statuses[row["idx"]]["status"] = (
+            "Candidate already exists" if existed.get(row["idx"]) else "Stored successfully"
+        )
 
-        if data is None or "name" not in data or "email" not in data:
-            raise ValueError("Invalid candidate data passed to save_to_neo4j")
-        
-        # Check if candidate already exists
-        exists = session.read_transaction(candidate_exists, data["name"], data["email"])
-        if not exists:
-            session.write_transaction(store_candidate, data)
-            return "Stored successfully"
-        return "Candidate already exists"
 
+def save_candidates_to_neo4j(candidates, batch_size=None, driver=None):
+    """Store many candidates with one write transaction per batch.
 
+    Returns one ``{"name", "email", "status", "error"}`` dict per input
+    candidate, in input order. Status is "Stored successfully", "Candidate
+    already exists", "Invalid candidate data" or "Store failed". When a batch
+    transaction fails its rows are retried one at a time, so a single bad CV
+    only fails itself.
+    """
+    batch_size = batch_size or NEO4J_WRITE_BATCH_SIZE
+    driver = driver or _get_driver()
+    canonicalize.load_known_names(driver)
+
+    statuses = []
+    valid = []
+    seen = {}
+    for idx, data in enumerate(candidates):
+        if not _has_identity(data):
+            statuses.append({"name": None, "email": None, "status": "Invalid candidate data", "error": None})
+            continue
+        statuses.append({"name": data["name"], "email": data["email"], "status": None, "error": None})
+        key = (data["name"], data["email"])
+        if key in seen:
+            # The same CV twice in one upload: only the first copy is written.
+            statuses[idx]["status"] = "Candidate already exists"
+            continue
+        seen[key] = idx
+        row = dict(_clean_candidate(data))
+        row["idx"] = idx
+        valid.append(row)
+
+    if not valid:
+        return statuses
+
+    with driver.session() as session:
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                _write_batch(session, batch, statuses)
+                continue
+            except Exception as e:
+                if len(batch) == 1:
+                    statuses[batch[0]["idx"]].update(status=STORE_FAILED, error=f"{type(e).__name__}: {e}")
+                    continue
+                logger.warning("batch write failed, retrying rows one by one",
+                               extra={"batch": len(batch), "error": str(e)})
+            for row in batch:
+                try:
+                    _write_batch(session, [row], statuses)
+                except Exception as e:
+                    statuses[row["idx"]].update(status=STORE_FAILED, error=f"{type(e).__name__}: {e}")
+    return statuses
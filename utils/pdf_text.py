@@ -0,0 +1,195 @@
+"""PDF text extraction with pluggable backends.
+
+Backends are optional imports; whichever are installed show up in
+``available_backends()``:
+
+- ``pypdf2``   PyPDF2 (pinned in requirements.txt, the default)
+- ``pypdf``    pypdf, PyPDF2's maintained successor
+- ``pdfminer`` pdfminer.six layout analysis, slower but keeps reading order
+
+Uploads are read into one bytes object; in-process extraction reads it in
+place. Oversized files are rejected, only the first ``max_pages`` pages are
+read, and long documents are split into page ranges that are extracted in a
+process pool. Each range task is sent its own pickled copy of the document
+(every worker has to parse the whole file to find its pages anyway), so a
+parallel extraction holds up to one extra copy per worker; PDF_MAX_BYTES
+bounds that.
+
+The pool uses the forkserver start method where available, else spawn:
+forking the multithreaded Streamlit or ingest process is not safe.
+"""
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+try:
+    import PyPDF2
+except ImportError:  # pragma: no cover - optional backend
+    PyPDF2 = None
+
+try:
+    import pypdf
+except ImportError:  # pragma: no cover - optional backend
+    pypdf = None
+
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+    from pdfminer.pdfpage import PDFPage
+except ImportError:  # pragma: no cover - optional backend
+    pdfminer_extract_text = None
+    PDFPage = None
+
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf2")
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(20 * 1024 * 1024)))
+# Documents with fewer pages than this are extracted in the calling thread;
+# spawning work in other processes only pays off for long files.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_PROCESS_WORKERS = int(os.getenv("PDF_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_START_METHOD = os.getenv(
+    "PDF_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+
+def _pypdf2_pages(data, start, stop):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, min(stop, len(reader.pages)))]
+
+
+def _pypdf2_count(data):
+    return len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+
+
+def _pypdf_pages(data, start, stop):
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, min(stop, len(reader.pages)))]
+
+
+def _pypdf_count(data):
+    return len(pypdf.PdfReader(io.BytesIO(data)).pages)
+
+
+def _pdfminer_pages(data, start, stop):
+    # pdfminer ends every page with a form feed
+    text = pdfminer_extract_text(io.BytesIO(data), page_numbers=list(range(start, stop)))
+    pages = text.split("\f")
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return pages
+
+
+def _pdfminer_count(data):
+    return sum(1 for _ in PDFPage.get_pages(io.BytesIO(data)))
+
+
+# name -> (module check, page counter, page-range extractor)
+_BACKENDS = {
+    "pypdf2": (lambda: PyPDF2 is not None, _pypdf2_count, _pypdf2_pages),
+    "pypdf": (lambda: pypdf is not None, _pypdf_count, _pypdf_pages),
+    "pdfminer": (lambda: pdfminer_extract_text is not None, _pdfminer_count, _pdfminer_pages),
+}
+
+
+def available_backends():
+    return [name for name, (installed, _, _) in _BACKENDS.items() if installed()]
+
+
+def _backend(name):
+    if name not in _BACKENDS:
+        raise ValueError(f"Unknown PDF backend {name!r}; choose one of {sorted(_BACKENDS)}")
+    installed, count, extract = _BACKENDS[name]
+    if not installed():
+        raise ValueError(f"PDF backend {name!r} is not installed")
+    return count, extract
+
+
+def _extract_range(backend, data, start, stop):
+    """Worker entry point; module level so the process pool can pickle it."""
+    return _backend(backend)[1](data, start, stop)
+
+
+def read_pdf_bytes(source, max_bytes=None):
+    """Return the PDF as bytes, refusing anything larger than ``max_bytes``.
+
+    Accepts bytes, bytearray, memoryview, a path, or a file-like object
+    (Streamlit's UploadedFile included). ``max_bytes=0`` disables the cap.
+    """
+    max_bytes = PDF_MAX_BYTES if max_bytes is None else max_bytes
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        size = memoryview(source).nbytes
+        data = source if isinstance(source, bytes) else None
+    elif isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+        data = None
+    elif hasattr(source, "getbuffer"):
+        size = source.getbuffer().nbytes
+        data = None
+    else:
+        # Unknown stream: read at most one byte past the cap
+        if hasattr(source, "seek"):
+            source.seek(0)
+        data = source.read(max_bytes + 1 if max_bytes else -1)
+        size = len(data)
+    if max_bytes and size > max_bytes:
+        raise ValueError(f"PDF is {size} bytes, larger than the {max_bytes} byte limit")
+    if data is not None:
+        return data
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    # BytesIO.getvalue() hands back its buffer without copying it again
+    return source.getvalue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    # The ingest parse stage calls this from several threads at once
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_PROCESS_WORKERS,
+                                        mp_context=multiprocessing.get_context(PDF_START_METHOD))
+        return _pool
+
+
+def extract_pages(source, backend=None, max_pages=None, max_bytes=None, workers=None):
+    """Return the text of each page (empty string for pages without text).
+
+    ``max_pages=0`` reads every page.
+    """
+    backend = backend or PDF_BACKEND
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    workers = PDF_PROCESS_WORKERS if workers is None else workers
+    count, extract = _backend(backend)
+    data = read_pdf_bytes(source, max_bytes)
+
+    total = count(data)
+    if max_pages:
+        total = min(total, max_pages)
+    if workers <= 1 or total < PDF_PARALLEL_MIN_PAGES:
+        return extract(data, 0, total)
+
+    step = -(-total // workers)
+    pool = _get_pool()
+    futures = [pool.submit(_extract_range, backend, data, start, min(start + step, total))
+               for start in range(0, total, step)]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def extract_text(source, backend=None, max_pages=None, max_bytes=None, workers=None):
+    return "\n".join(extract_pages(source, backend, max_pages, max_bytes, workers))
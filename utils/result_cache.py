@@ -0,0 +1,178 @@
+"""Cache of read-only Cypher results, invalidated by graph writes.
+
+Results are keyed by the normalized Cypher text plus its parameters. The
+graph only changes when utils.neo4j_ops stores candidates (or a schema
+migration backfills properties). Each successful write bumps a version
+counter kept in the graph itself, on a ``(:GraphMeta {key: "graph"})`` node,
+in the same transaction as the write. Every cached read first fetches that
+counter (one indexed lookup) and it is part of the cache key, so a write from
+any process, such as ingest_cli.py or a second app instance, invalidates the
+cache at once. Writes in this process also call ``bump_graph_version()``,
+which empties the cache.
+
+RESULT_CACHE_SHARED_VERSION=0 skips the per-read lookup. Only writes in this
+process are then seen, and RESULT_CACHE_TTL is the only bound on how stale a
+result from another process's write can be.
+
+Memory is bounded in two ways: at most RESULT_CACHE_SIZE entries, evicted
+least-recently-used first, and results larger than
+RESULT_CACHE_MAX_ENTRY_BYTES are not cached at all. Entries are copied in
+and out, so a caller that edits its rows cannot change what other sessions
+are served.
+"""
+import copy
+import json
+import os
+import re
+import threading
+
+from dotenv import load_dotenv
+
+from utils.lru_cache import LRUCache
+
+load_dotenv()
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(256 * 1024)))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+RESULT_CACHE_SHARED_VERSION = os.getenv("RESULT_CACHE_SHARED_VERSION", "1").lower() in ("1", "true", "yes")
+
+GRAPH_VERSION_QUERY = "MATCH (m:GraphMeta {key: 'graph'}) RETURN m.version AS version"
+# Run inside the writing transaction, so readers never see the data without the bump
+BUMP_GRAPH_VERSION_QUERY = (
+    "MERGE (m:GraphMeta {key: 'graph'}) SET m.version = coalesce(m.version, 0) + 1"
+)
+
+_STRING = r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`"
+_TOKENS = re.compile(rf"({_STRING})|(\s+)")
+# Anything that can change the graph, or call code we cannot see into
+_WRITE_CLAUSE = re.compile(
+    r"\b(CREATE|MERGE|SET|DELETE|DETACH|REMOVE|DROP|FOREACH|LOAD\s+CSV|CALL)\b", re.IGNORECASE)
+
+
+def _outside_strings(cypher):
+    return re.sub(_STRING, "''", cypher)
+
+
+def normalize_cypher(cypher):
+    """Collapse whitespace outside string literals and drop a trailing ';'."""
+    def replace(match):
+        return match.group(1) if match.group(1) else " "
+    return _TOKENS.sub(replace, cypher).strip().rstrip(";").strip()
+
+
+def is_read_only(cypher):
+    return not _WRITE_CLAUSE.search(_outside_strings(cypher))
+
+
+_version = 0
+_version_lock = threading.Lock()
+
+
+def graph_version():
+    return _version
+
+
+def stored_graph_version(driver):
+    """The graph's own write counter; None when it cannot be read."""
+    try:
+        with driver.session() as session:
+            record = session.run(GRAPH_VERSION_QUERY).single()
+    except Exception:
+        return None
+    return (record["version"] if record else None) or 0
+
+
+async def astored_graph_version(driver):
+    try:
+        async with driver.session() as session:
+            result = await session.run(GRAPH_VERSION_QUERY)
+            records = [record async for record in result]
+    except Exception:
+        return None
+    return (records[0]["version"] if records else None) or 0
+
+
+class ResultCache:
+    def __init__(self, maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL,
+                 max_entry_bytes=RESULT_CACHE_MAX_ENTRY_BYTES, shared_version=RESULT_CACHE_SHARED_VERSION):
+        self.max_entry_bytes = max_entry_bytes
+        self.shared_version = shared_version
+        self.skipped_large = 0
+        self._entries = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _query_key(cypher, params):
+        if not is_read_only(cypher):
+            return None
+        try:
+            return normalize_cypher(cypher), json.dumps(params or {}, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _key(query_key, mode, stored):
+        if query_key is None or stored is None:
+            return None
+        # Results cached before a write carry an older version and never match
+        return (graph_version(), stored, mode) + query_key
+
+    def key(self, cypher, params, mode, driver=None):
+        """None when the query must not be cached. With a ``driver`` (and
+        shared versioning on), the graph's write counter is read first."""
+        query_key = self._query_key(cypher, params)
+        if query_key is None:
+            return None
+        stored = stored_graph_version(driver) if self.shared_version and driver is not None else 0
+        return self._key(query_key, mode, stored)
+
+    async def akey(self, cypher, params, mode, driver=None):
+        query_key = self._query_key(cypher, params)
+        if query_key is None:
+            return None
+        stored = await astored_graph_version(driver) if self.shared_version and driver is not None else 0
+        return self._key(query_key, mode, stored)
+
+    def get(self, key):
+        if key is None:
+            return None
+        value = self._entries.get(key)
+        return None if value is None else copy.deepcopy(value)
+
+    def put(self, key, value):
+        if key is None:
+            return
+        try:
+            size = len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return
+        if size > self.max_entry_bytes:
+            self.skipped_large += 1
+            return
+        self._entries.set(key, copy.deepcopy(value))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {**self._entries.stats(), "graph_version": graph_version(),
+                "shared_version": self.shared_version, "skipped_large": self.skipped_large}
+
+
+_cache = ResultCache() if RESULT_CACHE_ENABLED else None
+
+
+def get_result_cache():
+    """The shared cache, or None when RESULT_CACHE_ENABLED is off."""
+    return _cache
+
+
+def bump_graph_version():
+    """Record that the graph changed; every cached result becomes stale."""
+    global _version
+    with _version_lock:
+        _version += 1
+    if _cache is not None:
+        _cache.clear()
+    return _version
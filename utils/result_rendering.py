@@ -0,0 +1,74 @@
+"""Deterministic markdown rendering for the result shapes we generate ourselves.
+
+build_followup_cypher and the resume query in the Cypher prompt always return
+some subset of name / email / skills / education / workExperience / projects.
+Those need no LLM to be readable; anything else returns None and is left to
+the LLM formatter.
+"""
+
+_NAME_KEYS = ("c.name", "name")
+_EMAIL_KEYS = ("c.email", "email")
+KNOWN_COLUMNS = set(_NAME_KEYS + _EMAIL_KEYS + ("skills", "education", "workExperience", "projects"))
+
+
+def _first(row, keys):
+    for key in keys:
+        if row.get(key) not in (None, ""):
+            return row[key]
+    return None
+
+
+def _non_empty(items):
+    # OPTIONAL MATCH + collect({...}) yields maps whose values are all null
+    return [
+        item for item in (items or [])
+        if item not in (None, "") and not (isinstance(item, dict) and not any(item.values()))
+    ]
+
+
+def _format_education(edu):
+    parts = [edu.get("degree"), edu.get("university")]
+    return ", ".join(str(p) for p in parts if p)
+
+
+def _format_work(work):
+    text = " at ".join(str(p) for p in (work.get("position"), work.get("company")) if p)
+    years = work.get("years")
+    if years not in (None, ""):
+        text += f" ({years} {'year' if years == 1 else 'years'})"
+    return text
+
+
+def can_render(result):
+    return (
+        isinstance(result, list)
+        and bool(result)
+        and all(isinstance(row, dict) and set(row) <= KNOWN_COLUMNS for row in result)
+        and all(_first(row, _NAME_KEYS) for row in result)
+    )
+
+
+def render_results(result):
+    """Render known result shapes as markdown, or return None."""
+    if not can_render(result):
+        return None
+
+    lines = []
+    for number, row in enumerate(result, start=1):
+        lines.append(f"{number}. **{_first(row, _NAME_KEYS)}**")
+        email = _first(row, _EMAIL_KEYS)
+        if email:
+            lines.append(f"   - Email: {email}")
+        skills = _non_empty(row.get("skills"))
+        if skills:
+            lines.append(f"   - Skills: {', '.join(str(s) for s in skills)}")
+        education = [e for e in (_format_education(e) for e in _non_empty(row.get("education"))) if e]
+        if education:
+            lines.append(f"   - Education: {'; '.join(education)}")
+        work = [w for w in (_format_work(w) for w in _non_empty(row.get("workExperience"))) if w]
+        if work:
+            lines.append(f"   - Work experience: {'; '.join(work)}")
+        projects = _non_empty(row.get("projects"))
+        if projects:
+            lines.append(f"   - Projects: {', '.join(str(p) for p in projects)}")
+    return "\n".join(lines)
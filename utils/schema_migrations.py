@@ -0,0 +1,230 @@
+import threading
+from datetime import datetime, timezone
+
+from utils.graph_schema import get_knowledge_graph_schema
+from utils.search_text import SEARCH_PROPERTIES, cypher_normalize_expression, search_property
+from utils import telemetry
+from utils.result_cache import BUMP_GRAPH_VERSION_QUERY, bump_graph_version
+
+logger = telemetry.get_logger(__name__)
+
+# Properties that identify a node. These are exactly the property sets used by
+# the MERGE clauses in utils.neo4j_ops, so each MERGE becomes an index seek.
+NODE_KEYS = {
+    "Candidate": ("name", "email"),
+    "Skill": ("name",),
+    "Education": ("degree", "university"),
+    "Work": ("company", "position", "years"),
+    "Project": ("name",),
+    "Activity": ("name",),
+}
+
+
+def schema_labels():
+    """Every node label mentioned in get_knowledge_graph_schema()."""
+    labels = []
+    for label, spec in get_knowledge_graph_schema().items():
+        labels.append(label)
+        labels.extend(spec.get("relationships", {}).values())
+    return list(dict.fromkeys(labels))
+
+
+def _props(var, props):
+    return ", ".join(f"{var}.{p}" for p in props)
+
+
+def _uniqueness_constraints():
+    missing = [label for label in schema_labels() if label not in NODE_KEYS]
+    if missing:
+        raise ValueError(f"No node key defined for labels: {missing}")
+    return [
+        f"CREATE CONSTRAINT {label.lower()}_key IF NOT EXISTS "
+        f"FOR (n:{label}) REQUIRE ({_props('n', NODE_KEYS[label])}) IS UNIQUE"
+        for label in schema_labels()
+    ]
+
+
+def _search_indexes():
+    statements = []
+    for label, props in SEARCH_PROPERTIES.items():
+        for prop in props:
+            twin = search_property(prop)
+            # Backfill nodes stored before ingestion wrote the *_search twins.
+            statements.append(
+                f"MATCH (n:{label}) WHERE n.{prop} IS NOT NULL AND n.{twin} IS NULL "
+                f"CALL {{ WITH n SET n.{twin} = toLower(trim(toString(n.{prop}))) }} "
+                f"IN TRANSACTIONS OF 10000 ROWS"
+            )
+            # TEXT indexes serve CONTAINS / STARTS WITH / ENDS WITH on the twin.
+            statements.append(
+                f"CREATE TEXT INDEX {label.lower()}_{twin} IF NOT EXISTS "
+                f"FOR (n:{label}) ON (n.{twin})"
+            )
+    labels = "|".join(SEARCH_PROPERTIES)
+    twins = sorted({search_property(p) for props in SEARCH_PROPERTIES.values() for p in props})
+    statements.append(
+        f"CREATE FULLTEXT INDEX search_text IF NOT EXISTS FOR (n:{labels}) "
+        f"ON EACH [{', '.join('n.' + t for t in twins)}]"
+    )
+    return statements
+
+
+def _renormalize_search_twins():
+    # Migration 3 backfilled with toLower(trim(...)), which keeps internal
+    # runs of whitespace; ingest collapses them. Recompute with the same rules.
+    statements = []
+    for label, props in SEARCH_PROPERTIES.items():
+        for prop in props:
+            twin = search_property(prop)
+            normalized = cypher_normalize_expression(f"n.{prop}")
+            statements.append(
+                f"MATCH (n:{label}) WHERE n.{prop} IS NOT NULL "
+                f"CALL {{ WITH n WITH n, {normalized} AS normalized "
+                f"WHERE n.{twin} IS NULL OR n.{twin} <> normalized SET n.{twin} = normalized }} "
+                f"IN TRANSACTIONS OF 10000 ROWS"
+            )
+    return statements
+
+
+# Ordered, append-only list of (version, description, statements). Never edit
+# an applied migration; add a new version instead.
+MIGRATIONS = [
+    (1, "Uniqueness constraints on node keys", _uniqueness_constraints()),
+    (2, "Lookup indexes for follow-up and query paths", [
+        # Follow-ups filter on c.name alone, which the composite
+        # (name, email) constraint index cannot serve.
+        "CREATE INDEX candidate_name IF NOT EXISTS FOR (c:Candidate) ON (c.name)",
+        "CREATE INDEX candidate_email IF NOT EXISTS FOR (c:Candidate) ON (c.email)",
+        "CREATE INDEX work_years IF NOT EXISTS FOR (w:Work) ON (w.years)",
+    ]),
+    (3, "Normalized *_search properties with text and full-text indexes", _search_indexes()),
+    (4, "Single graph version counter for result caches", [
+        "CREATE CONSTRAINT graph_meta_key IF NOT EXISTS FOR (m:GraphMeta) REQUIRE m.key IS UNIQUE",
+    ]),
+    (5, "Backfilled *_search twins normalized like ingest", _renormalize_search_twins()),
+    # No query goes through db.index.fulltext.queryNodes; the per-property
+    # TEXT indexes from migration 3 serve CONTAINS, so the full-text index
+    # only added write cost.
+    (6, "Drop the unused search_text full-text index", [
+        "DROP INDEX search_text IF EXISTS",
+    ]),
+]
+
+_applied_lock = threading.Lock()
+_schema_ready = False
+
+
+def applied_versions(driver):
+    with driver.session() as session:
+        result = session.run("MATCH (m:SchemaMigration) RETURN m.version AS version")
+        return {record["version"] for record in result}
+
+
+def apply_migrations(driver):
+    """Apply every migration that is not yet recorded in the graph.
+
+    Statements use IF NOT EXISTS, so re-running a partially applied migration
+    is safe. Returns the list of versions applied by this call.
+    """
+    done = applied_versions(driver)
+    applied = []
+    with driver.session() as session:
+        for version, description, statements in MIGRATIONS:
+            if version in done:
+                continue
+            # Schema commands cannot share a transaction with data writes,
+            # so each one runs as its own auto-commit query.
+            for statement in statements:
+                session.run(statement).consume()
+            session.run(
+                "MERGE (m:SchemaMigration {version: $version}) "
+                "SET m.description = $description, m.applied_at = $applied_at",
+                version=version,
+                description=description,
+                applied_at=datetime.now(timezone.utc).isoformat(),
+            ).consume()
+            logger.info("applied schema migration", extra={"version": version, "description": description})
+            applied.append(version)
+    if applied:
+        # Migrations may backfill properties that cached queries read
+        with driver.session() as session:
+            session.run(BUMP_GRAPH_VERSION_QUERY).consume()
+        bump_graph_version()
+    return applied
+
+
+def ensure_schema(driver):
+    """Apply pending migrations once per process."""
+    global _schema_ready
+    with _applied_lock:
+        if _schema_ready:
+            return []
+        applied = apply_migrations(driver)
+        _schema_ready = True
+        return applied
+
+
+def _plan_operators(plan):
+    if not plan:
+        return []
+    found = [(plan.get("operatorType", ""), plan.get("args", {}).get("Details", ""))]
+    for child in plan.get("children", []):
+        found.extend(_plan_operators(child))
+    return found
+
+
+def explain_index_usage(driver, query, parameters=None):
+    """EXPLAIN a query and return which index seeks and label scans it plans."""
+    with driver.session() as session:
+        summary = session.run("EXPLAIN " + query, parameters or {}).consume()
+    operators = _plan_operators(summary.plan)
+    return {
+        "index_ops": [(op, details) for op, details in operators if "Index" in op],
+        "label_scans": [(op, details) for op, details in operators if "LabelScan" in op or "AllNodesScan" in op],
+    }
+
+
+def index_usage_report(driver):
+    """Read counters for every index, as reported by SHOW INDEXES."""
+    with driver.session() as session:
+        result = session.run(
+            "SHOW INDEXES YIELD name, type, labelsOrTypes, properties, readCount, lastRead "
+            "RETURN name, type, labelsOrTypes, properties, readCount, lastRead ORDER BY name"
+        )
+        return [record.data() for record in result]
+
+
+def report_hot_paths(driver):
+    """Plan the ingest and follow-up queries and show which indexes they hit."""
+    from utils.neo4j_ops import BATCH_STORE_QUERY
+
+    paths = {
+        "ingest: batch store": (BATCH_STORE_QUERY, {"batch": []}),
+        "query: follow-up by name": (
+            "MATCH (c:Candidate) WHERE c.name IN $names AND any(k IN $candidates "
+            "WHERE k.name = c.name AND (k.email IS NULL OR k.email = c.email)) RETURN c.name, c.email",
+            {"names": [], "candidates": []},
+        ),
+        "query: skill keyword": (
+            "MATCH (c:Candidate)-[:HAS_SKILL]->(s:Skill) "
+            "WHERE s.name_search CONTAINS $keyword RETURN DISTINCT c.name",
+            {"keyword": "python"},
+        ),
+    }
+    return {name: explain_index_usage(driver, query, params) for name, (query, params) in paths.items()}
+
+
+if __name__ == "__main__":
+    from utils.connections import get_neo4j_driver
+
+    driver = get_neo4j_driver()
+    print("Applied migrations:", apply_migrations(driver) or "none pending")
+    for path, usage in report_hot_paths(driver).items():
+        print(f"\n{path}")
+        for op, details in usage["index_ops"]:
+            print(f"  index  {op}: {details}")
+        for op, details in usage["label_scans"]:
+            print(f"  SCAN   {op}: {details}")
+    print("\nIndex read counters:")
+    for row in index_usage_report(driver):
+        print(f"  {row['name']}: reads={row['readCount']} last={row['lastRead']}")
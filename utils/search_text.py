@@ -0,0 +1,72 @@
+import re
+
+# String properties that get a pre-normalized "<prop>_search" twin at ingest.
+# Keyword filters run against the twin so Neo4j can serve them from a TEXT
+# index instead of evaluating toLower() on every node.
+SEARCH_PROPERTIES = {
+    "Candidate": ("name", "email"),
+    "Skill": ("name",),
+    "Work": ("company", "position"),
+    "Education": ("university", "degree"),
+    "Project": ("name",),
+    "Activity": ("name",),
+}
+
+_SEARCHABLE = {prop for props in SEARCH_PROPERTIES.values() for prop in props}
+
+
+def search_property(prop):
+    return f"{prop}_search"
+
+
+def normalize_search_text(value):
+    """Lowercase and collapse whitespace; the form stored in *_search properties."""
+    if value is None:
+        return None
+    return " ".join(str(value).split()).lower()
+
+
+# Every character str.split() treats as whitespace, so the Cypher version
+# below collapses exactly what normalize_search_text does.
+_WHITESPACE = "".join(chr(c) for c in range(0x110000) if chr(c).isspace())
+
+
+def cypher_normalize_expression(expr):
+    """Cypher expression computing normalize_search_text(expr) in the database."""
+    spaced = f"toString({expr})"
+    for char in _WHITESPACE:
+        if char != " ":
+            spaced = f"replace({spaced}, '\\u{ord(char):04x}', ' ')"
+    words = f"[w IN split({spaced}, ' ') WHERE w <> '']"
+    return f"toLower(reduce(s = '', w IN {words} | s + CASE s WHEN '' THEN '' ELSE ' ' END + w))"
+
+
+def add_search_properties(item, props):
+    """Set ``<prop>_search`` on a dict for each of ``props`` that it has."""
+    for prop in props:
+        if item.get(prop) is not None:
+            item[search_property(prop)] = normalize_search_text(item[prop])
+    return item
+
+
+# toLower(x.prop) CONTAINS toLower("kw"), toLower(x.prop) = "kw", ...
+_TOLOWER_FILTER = re.compile(
+    r"""toLower\(\s*(?P<var>\w+)\.(?P<prop>\w+)\s*\)\s*
+        (?P<op>CONTAINS|STARTS\s+WITH|ENDS\s+WITH|=)\s*
+        (?:toLower\(\s*(?P<q1>["'])(?P<kw1>.*?)(?P=q1)\s*\)|(?P<q2>["'])(?P<kw2>.*?)(?P=q2))""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+def rewrite_contains_filters(cypher):
+    """Rewrite toLower(...) keyword filters to use the indexed *_search twins."""
+    def replace(match):
+        prop = match.group("prop")
+        if prop not in _SEARCHABLE:
+            return match.group(0)
+        keyword = match.group("kw1") if match.group("kw1") is not None else match.group("kw2")
+        keyword = normalize_search_text(keyword).replace('"', '\\"')
+        op = " ".join(match.group("op").upper().split())
+        return f'{match.group("var")}.{search_property(prop)} {op} "{keyword}"'
+
+    return _TOLOWER_FILTER.sub(replace, cypher)
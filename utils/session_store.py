@@ -0,0 +1,76 @@
+"""Conversation persistence in a dedicated, indexed MongoDB collection.
+
+One document per session: {session_id, messages, context, version, updated_at}.
+``context`` holds small structured side records, such as the candidates in
+the last result set, that follow-ups read directly.
+Each turn is appended with $push/$slice, so a write costs the same however
+long the conversation is, and ``version`` lets readers skip reloading a copy
+they already have. Idle sessions expire through a TTL index on updated_at.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, ReturnDocument
+
+from utils.connections import get_mongo_db
+
+load_dotenv()
+
+CHAT_SESSIONS_COLLECTION = os.getenv("CHAT_SESSIONS_COLLECTION", "chat_sessions")
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "200"))
+
+_indexes_ready = False
+_indexes_lock = threading.Lock()
+
+
+def get_sessions_collection():
+    global _indexes_ready
+    collection = get_mongo_db()[CHAT_SESSIONS_COLLECTION]
+    with _indexes_lock:
+        if not _indexes_ready:
+            collection.create_index([("session_id", ASCENDING)], unique=True, name="session_id_unique")
+            collection.create_index("updated_at", expireAfterSeconds=SESSION_TTL_SECONDS, name="updated_at_ttl")
+            _indexes_ready = True
+    return collection
+
+
+def append_messages(session_id, messages, context=None, max_messages=SESSION_MAX_MESSAGES):
+    """Append serialized messages, merge ``context`` keys, return the new version."""
+    updates = {"updated_at": datetime.now(timezone.utc)}
+    for key, value in (context or {}).items():
+        updates[f"context.{key}"] = value
+    doc = get_sessions_collection().find_one_and_update(
+        {"session_id": session_id},
+        {
+            "$push": {"messages": {"$each": list(messages), "$slice": -max_messages}},
+            "$inc": {"version": 1},
+            "$set": updates,
+        },
+        projection={"version": 1, "_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["version"]
+
+
+def get_version(session_id):
+    """Stored version of a session (0 if it does not exist); reads no messages."""
+    doc = get_sessions_collection().find_one({"session_id": session_id}, {"version": 1, "_id": 0})
+    return doc.get("version", 0) if doc else 0
+
+
+def load_messages(session_id):
+    """Return (messages, version, context) for a session."""
+    doc = get_sessions_collection().find_one(
+        {"session_id": session_id}, {"messages": 1, "version": 1, "context": 1, "_id": 0}
+    )
+    if not doc:
+        return [], 0, {}
+    return doc.get("messages", []), doc.get("version", 0), doc.get("context", {})
+
+
+def delete_session(session_id):
+    get_sessions_collection().delete_one({"session_id": session_id})
@@ -0,0 +1,197 @@
+"""Structured logging, stage timing spans and a metrics endpoint.
+
+    from utils import telemetry
+    logger = telemetry.get_logger(__name__)
+
+    with telemetry.span("chat.classify"):
+        ...
+
+Every span records its duration in a per-stage window of recent samples.
+``snapshot()`` reports count, errors and p50/p95/p99 per stage, and
+``start_metrics_server()`` serves them on METRICS_PORT in two forms:
+Prometheus text at /metrics and JSON at /metrics.json. Log records are
+written as one JSON object per line. LOG_LEVEL sets the level, and span
+timings are logged at DEBUG.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Percentiles are computed over this many most recent samples per stage
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))
+
+ROOT_LOGGER = "candidate_parsing"
+
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        # Anything passed through ``extra=`` becomes a field of its own
+        for key, value in vars(record).items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level=None):
+    """Send this project's logs to stderr as JSON lines (idempotent)."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        root = logging.getLogger(ROOT_LOGGER)
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        root.addHandler(handler)
+        root.setLevel(level or LOG_LEVEL)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    """Logger under the project root, e.g. get_logger(__name__)."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+logger = get_logger("telemetry")
+
+
+class _Stage:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=METRICS_WINDOW)
+
+
+_stages = {}
+_stages_lock = threading.Lock()
+
+
+def record(stage, seconds, error=False):
+    with _stages_lock:
+        entry = _stages.get(stage)
+        if entry is None:
+            entry = _stages[stage] = _Stage()
+        entry.count += 1
+        entry.errors += int(error)
+        entry.total += seconds
+        entry.samples.append(seconds)
+
+
+@contextmanager
+def span(stage, **fields):
+    """Time the block under ``stage``; failures are counted and re-raised."""
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        record(stage, seconds, error)
+        logger.debug("span", extra={"stage": stage, "duration_ms": round(seconds * 1000, 2),
+                                    "status": "error" if error else "ok", **fields})
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def snapshot():
+    """{stage: {count, errors, sum_s, p50_s, p95_s, p99_s}}"""
+    with _stages_lock:
+        stages = {name: (entry.count, entry.errors, entry.total, sorted(entry.samples))
+                  for name, entry in _stages.items()}
+    report = {}
+    for name, (count, errors, total, ordered) in sorted(stages.items()):
+        report[name] = {"count": count, "errors": errors, "sum_s": total}
+        for label, q in (("p50_s", 0.50), ("p95_s", 0.95), ("p99_s", 0.99)):
+            report[name][label] = _percentile(ordered, q) if ordered else None
+    return report
+
+
+def prometheus_text():
+    lines = [
+        "# HELP stage_duration_seconds Duration of pipeline stages.",
+        "# TYPE stage_duration_seconds summary",
+    ]
+    errors = ["# HELP stage_errors_total Stage executions that raised.",
+              "# TYPE stage_errors_total counter"]
+    for name, stats in snapshot().items():
+        for label, q in (("p50_s", "0.5"), ("p95_s", "0.95"), ("p99_s", "0.99")):
+            if stats[label] is not None:
+                lines.append(f'stage_duration_seconds{{stage="{name}",quantile="{q}"}} {stats[label]:.6f}')
+        lines.append(f'stage_duration_seconds_sum{{stage="{name}"}} {stats["sum_s"]:.6f}')
+        lines.append(f'stage_duration_seconds_count{{stage="{name}"}} {stats["count"]}')
+        errors.append(f'stage_errors_total{{stage="{name}"}} {stats["errors"]}')
+    return "\n".join(lines + errors) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics and /metrics.json from a daemon thread, once per process.
+
+    Does nothing unless a port is given or METRICS_PORT is set.
+    """
+    global _server
+    port = METRICS_PORT if port is None else port
+    with _server_lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        except OSError as e:
+            logger.warning("metrics server not started", extra={"port": port, "error": str(e)})
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info("metrics server listening", extra={"port": port})
+        return _server